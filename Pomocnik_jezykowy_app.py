@@ -1,90 +1,427 @@
-from io import BytesIO
+from io import BytesIO, SEEK_END
 import streamlit as st
 from audiorecorder import audiorecorder # type: ignore
 from dotenv import dotenv_values
-from openai import OpenAI
-from hashlib import md5
+import httpx
+from hashlib import md5, blake2b, sha256
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from contextlib import closing
+import importlib.util
+import json
+import os
+from tempfile import NamedTemporaryFile
+import logging
+import random
+import re
+import sqlite3
+import time
 from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct, Distance, VectorParams
+from qdrant_client.models import (
+    PointStruct,
+    Distance,
+    VectorParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    QuantizationSearchParams,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+)
 import uuid
 
+logger = logging.getLogger(__name__)
+
 env = dotenv_values(".env")
-if 'QDRANT_URL' in st.secrets:
-    env['QDRANT_URL'] = st.secrets['QDRANT_URL']
-if 'QDRANT_API_KEY' in st.secrets:
-    env['QDRANT_API_KEY'] = st.secrets['QDRANT_API_KEY']
+
+# Ani Streamlit, ani aplikacja nie konfigurują głównego loggera - bez tego komunikaty INFO (np. czasy odpowiedzi API) by przepadały.
+# basicConfig nic nie robi przy kolejnych przebiegach skryptu, gdy handler już istnieje
+logging.basicConfig(level=env.get("LOG_LEVEL") or "INFO", format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+# httpx loguje na poziomie INFO każde zapytanie HTTP - to zagłuszyłoby czasy odpowiedzi
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Miejsca, w których Streamlit szuka pliku secrets.toml (domyślna opcja secrets.files)
+STREAMLIT_SECRETS_PATHS = (
+    os.path.join(os.path.expanduser("~"), ".streamlit", "secrets.toml"),
+    os.path.join(os.getcwd(), ".streamlit", "secrets.toml"),
+)
+
+# Bez pliku secrets.toml (lokalne uruchomienie z samym .env) nie dotykamy st.secrets - przy braku pliku
+# wypisuje on st.error jeszcze przed st.set_page_config, co przerywa uruchomienie aplikacji
+if any(os.path.exists(path) for path in STREAMLIT_SECRETS_PATHS):
+    for secret_name in ('QDRANT_URL', 'QDRANT_API_KEY'):
+        if secret_name in st.secrets:
+            env[secret_name] = st.secrets[secret_name]
 
 EMBEDDING_MODEL = "text-embedding-3-large"
 
 EMBEDDING_DIM = 3072
 
+EMBEDDING_BATCH_SIZE = int(env.get("EMBEDDING_BATCH_SIZE") or 64)
+
+EMBEDDING_CONCURRENCY = int(env.get("OPENAI_EMBED_CONCURRENCY") or 5)
+
+EMBEDDING_MAX_RETRIES = 5
+
+EMBEDDING_CACHE_MAX_ENTRIES = 1024
+
 QDRANT_COLLECTION_NAME = "notes"
 
+QDRANT_PATH = env.get("QDRANT_PATH") or "./qdrant_data"
+
+QDRANT_MEMMAP_THRESHOLD = 20000
+
+NOTES_LIMIT = 15
+
+NOTES_CACHE_TTL_SECONDS = 60
+
+SEARCH_RESULTS_PAGE_SIZE = 5
+
+# Ile ostatnich par pytanie/odpowiedź z historii czatu wysyłamy do modelu (oprócz promptu systemowego)
+CHAT_HISTORY_MAX_TURNS = 8
+
+# Parametry indeksu HNSW dobrane pod 3072-wymiarowe wektory i metrykę cosinusową
+HNSW_M = 24
+HNSW_EF_CONSTRUCT = 200
+HNSW_EF_SEARCH = 128
+
 AUDIO_TRANSCRIBE_MODEL = "whisper-1"
 
-def get_openai_client():
-    return OpenAI(api_key=st.session_state["openai_api_key"])
+AUDIO_HASH_CHUNK_SIZE = 1024 * 1024
+
+# Limit rozmiaru pliku w API transkrypcji OpenAI
+AUDIO_UPLOAD_MAX_BYTES = 25 * 1024 * 1024
+
+AUDIO_MIME_TYPES = {"wav": "audio/wav", "mp3": "audio/mpeg", "opus": "audio/ogg", "aac": "audio/aac", "flac": "audio/flac"}
+
+# Trwała pamięć odpowiedzi GPT-4o (poprawa i tłumaczenia notatek) - tylko dla identycznego zapytania i tego samego klucza API
+RESPONSE_CACHE_PATH = env.get("RESPONSE_CACHE_PATH") or "./response_cache.sqlite3"
+
+RESPONSE_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+COMPLETION_CACHE_MAX_ENTRIES = 256
+
+# Limit tokenów odpowiedzi przy poprawie i tłumaczeniu rośnie z długością tekstu (tłumaczenie bywa ~1.2x dłuższe od oryginału)
+COMPLETION_TOKENS_PER_CHAR = 0.6
+COMPLETION_MIN_TOKENS = 256
+# Najwięcej tokenów, ile gpt-4o może wygenerować w jednej odpowiedzi
+COMPLETION_MAX_TOKENS = 16000
+
+# Tłumaczenia domyślnie robi szybszy i tańszy gpt-4o-mini; w panelu bocznym można przełączyć je na gpt-4o
+TRANSLATION_MODEL = "gpt-4o-mini"
+TRANSLATION_HIGH_QUALITY_MODEL = "gpt-4o"
+
+# Prompt poprawy notatki - wysyłany przy każdej poprawie, więc możliwie krótki
+CORRECTION_SYSTEM_PROMPT = "Wykryj język tekstu i popraw w nim błędy gramatyczne, ortograficzne, składniowe i stylistyczne. Nie zmieniaj sensu ani języka."
+
+# Utrzymywane połączenia HTTP klienta OpenAI - wystarczą dla równoległych tłumaczeń, TTS i embeddings
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = 20
+
+OPENAI_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS, max_connections=100)
+
+# HTTP/2 (wiele równoległych zapytań w jednym połączeniu) tylko, gdy zainstalowano opcjonalny pakiet h2 (pip install httpx[http2])
+OPENAI_HTTP2 = importlib.util.find_spec("h2") is not None
+
+@st.cache_resource
+def get_openai_client_for_key(api_key: str):
+    # Jeden klient (i jego pula połączeń HTTP) na klucz API, współdzielony między przebiegami skryptu
+    # SDK openai (wraz z pydantic) importujemy dopiero przy pierwszym zapytaniu - strona nie czeka na ten import
+    from openai import OpenAI, DefaultHttpxClient
+    return OpenAI(
+        api_key=api_key,
+        http_client=DefaultHttpxClient(limits=OPENAI_HTTP_LIMITS, http2=OPENAI_HTTP2),
+    )
+
+def new_async_openai_client(api_key):
+    """Tworzy klienta AsyncOpenAI z tą samą pulą połączeń co klient synchroniczny - do użycia w jednym asyncio.run."""
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+    return AsyncOpenAI(
+        api_key=api_key,
+        http_client=DefaultAsyncHttpxClient(limits=OPENAI_HTTP_LIMITS, http2=OPENAI_HTTP2),
+    )
 
-def transcribe_audio(audio_bytes):
+def get_openai_client():
+    """Zwraca współdzielonego (cache_resource) klienta OpenAI dla klucza z bieżącej sesji - tani w każdym wywołaniu.
+
+    Czyta session_state, więc wołamy ją w wątku skryptu, a wątkom roboczym przekazujemy gotowego klienta.
+    """
+    return get_openai_client_for_key(st.session_state["openai_api_key"])
+
+def trim_cache(cache, max_entries):
+    """Usuwa najstarsze wpisy (w kolejności dodania) słownikowej pamięci sesji, aby nie rosła ponad max_entries."""
+    while len(cache) > max_entries:
+        cache.pop(next(iter(cache)))
+
+def current_translation_model():
+    """Model tłumaczeń: TRANSLATION_MODEL, a po zaznaczeniu wyższej jakości w panelu bocznym - TRANSLATION_HIGH_QUALITY_MODEL."""
+    if st.session_state.get("translation_high_quality"):
+        return TRANSLATION_HIGH_QUALITY_MODEL
+    return TRANSLATION_MODEL
+
+def completion_max_tokens(text, languages=1):
+    """Limit max_tokens dla poprawy lub tłumaczenia tekstu (na languages języków naraz) - z zapasem, by nie uciąć odpowiedzi."""
+    per_language = max(COMPLETION_MIN_TOKENS, int(len(text) * COMPLETION_TOKENS_PER_CHAR) + 128)
+    return min(COMPLETION_MAX_TOKENS, per_language * languages)
+
+def warn_if_truncated(finish_reason, model="gpt-4o"):
+    if finish_reason == "length":
+        logger.warning("%s: odpowiedź ucięta na limicie max_tokens", model)
+
+def completion_deltas(stream, model="gpt-4o", outcome=None):
+    """Zwraca kolejne fragmenty tekstu ze strumienia odpowiedzi; ucięcie na limicie max_tokens trafia do logu.
+
+    Jeśli podano słownik outcome, pod kluczem "finish_reason" trafia do niego powód zakończenia odpowiedzi.
+    """
+    for event in stream:
+        if not event.choices:
+            continue
+        yield event.choices[0].delta.content or ""
+        finish_reason = event.choices[0].finish_reason
+        if finish_reason is not None and outcome is not None:
+            outcome["finish_reason"] = finish_reason
+        warn_if_truncated(finish_reason, model)
+
+def stream_chat_completion(messages, max_tokens=5000, on_sentence=None, model="gpt-4o"):
+    """Strumieniuje odpowiedź modelu (domyślnie gpt-4o) na stronę token po tokenie; zwraca (cały tekst, finish_reason).
+
+    Podgląd znika po zakończeniu - gotowy tekst wyświetla już pole edycji lub historia czatu.
+    Jeśli podano on_sentence, jest wywoływana z każdym kolejnym pełnym zdaniem, gdy tylko do niego dotrze strumień.
+    """
+    openai_client = get_openai_client()
+    started = time.perf_counter()
+    stream = openai_client.chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=max_tokens,
+        stream=True,
+    )
+    outcome = {}
+    deltas = log_time_to_first_token(completion_deltas(stream, model, outcome), started, model)
+    if on_sentence is not None:
+        deltas = emit_sentences(deltas, on_sentence)
+    preview = st.empty()
+    with preview:
+        text = st.write_stream(deltas)
+    preview.empty()
+    return text, outcome.get("finish_reason")
+
+def log_time_to_first_token(deltas, started, model="gpt-4o"):
+    """Przepuszcza fragmenty odpowiedzi (tekst lub bajty audio) dalej, logując czas do pierwszego niepustego fragmentu i całkowity czas odpowiedzi."""
+    first_token_at = None
+    for delta in deltas:
+        if delta and first_token_at is None:
+            first_token_at = time.perf_counter()
+            logger.info("%s: pierwszy fragment po %.0f ms", model, (first_token_at - started) * 1000)
+        yield delta
+    logger.info("%s: cała odpowiedź po %.0f ms", model, (time.perf_counter() - started) * 1000)
+
+def emit_sentences(deltas, on_sentence):
+    """Przepuszcza fragmenty tekstu dalej, wywołując on_sentence dla każdej grupy domkniętych zdań (i reszty na końcu).
+
+    Jak w tts_sentence_groups grupa ma co najmniej TTS_CHUNK_TARGET_CHARS znaków - krótkie zdania i skróty typu "np." nie są osobnymi zapytaniami TTS.
+    """
+    sentence_buffer, group = "", ""
+    for delta in deltas:
+        yield delta
+        sentence_buffer += delta
+        *sentences, sentence_buffer = SENTENCE_BOUNDARY.split(sentence_buffer)
+        for sentence in sentences:
+            group = f"{group} {sentence}" if group else sentence
+            if len(group) >= TTS_CHUNK_TARGET_CHARS:
+                on_sentence(group)
+                group = ""
+    rest = f"{group} {sentence_buffer}".strip()
+    if rest:
+        on_sentence(rest)
+
+def audio_fingerprint(audio_bytes):
+    """Liczy 128-bitowy skrót BLAKE2b nagrania przyrostowo, w kawałkach po AUDIO_HASH_CHUNK_SIZE bajtów."""
+    # BLAKE2b jest w CPythonie szybszy od md5, a do wykrywania zmian nagrania wystarczy 16 bajtów skrótu
+    digest = blake2b(digest_size=16)
+    view = memoryview(audio_bytes)
+    for start in range(0, len(view), AUDIO_HASH_CHUNK_SIZE):
+        digest.update(view[start:start + AUDIO_HASH_CHUNK_SIZE])
+    return digest.hexdigest()
+
+def export_note_audio(note_audio):
+    """Eksportuje nagranie do WAV (lub mp3, gdy WAV byłby za duży), używając jednego bufora BytesIO na sesję."""
+    audio = st.session_state.setdefault("_note_audio_buffer", BytesIO())
+    audio.seek(0)
+    audio.truncate()
+    # WAV to nagłówek i surowe próbki PCM - pydub zapisuje go sam, bez kodowania przez ffmpeg
+    note_audio.export(audio, format="wav")
+    # Długie nagrania jako WAV przekroczyłyby limit API transkrypcji - wtedy kodujemy je do mp3
+    # (pydub po zapisie WAV przewija bufor na początek, więc rozmiar bierzemy z pozycji końca)
+    if audio.seek(0, SEEK_END) > AUDIO_UPLOAD_MAX_BYTES:
+        audio.seek(0)
+        audio.truncate()
+        note_audio.export(audio, format="mp3")
+    return audio.getvalue()
+
+def note_audio_format(audio_bytes):
+    return "wav" if audio_bytes[:4] == b"RIFF" else "mp3"
+
+def store_note_audio(audio_bytes):
+    """Zapisuje nagranie w sesji; skrót liczony jest tylko wtedy, gdy nagranie się zmieniło."""
+    previous_bytes = st.session_state["note_audio_bytes"]
+    # Porównanie długości i zawartości (memcmp) jest dużo tańsze niż ponowne haszowanie
+    if previous_bytes is not None and len(previous_bytes) == len(audio_bytes) and previous_bytes == audio_bytes:
+        return
+    st.session_state["note_audio_bytes"] = audio_bytes
+    st.session_state["note_audio_fingerprint"] = audio_fingerprint(audio_bytes)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def transcribe_audio(_audio_bytes, fingerprint):
+    # Kluczem cache jest wyłącznie fingerprint (skrót z audio_fingerprint) - ponowne kliknięcie "Transkrybuj audio" dla tego samego nagrania nic nie kosztuje
     openai_client = get_openai_client()
-    audio_file = BytesIO(audio_bytes)
-    audio_file.name = "audio.mp3"
+    audio_format = note_audio_format(_audio_bytes)
     transcript = openai_client.audio.transcriptions.create(
-        file=audio_file,
+        # Krotka (nazwa, dane, typ MIME) - SDK wysyła bajty bez opakowywania ich w kolejny bufor
+        file=(f"audio.{audio_format}", _audio_bytes, AUDIO_MIME_TYPES[audio_format]),
         model=AUDIO_TRANSCRIBE_MODEL,
-        response_format="verbose_json",
+        # Sam tekst - bez segmentów i znaczników czasu, których i tak nie używamy
+        response_format="text",
     )
 
-    return transcript.text
+    # Dla formatu "text" SDK zwraca zwykły napis (zakończony znakiem nowej linii)
+    return transcript.strip()
 
 #
 # Sekcja operacji na bazie danych (DB)
 #
 @st.cache_resource
 def get_qdrant_client():
+    # Bez adresu serwera używamy lokalnej bazy na dysku - notatki i embeddingi przetrwają restart aplikacji
+    if not env.get("QDRANT_URL"):
+        return QdrantClient(path=QDRANT_PATH)
     return QdrantClient(
         url=env["QDRANT_URL"],
-        api_key=env["QDRANT_API_KEY"],
+        api_key=env.get("QDRANT_API_KEY"),
     )
 
 def assure_db_collection_exists():
     qdrant_client = get_qdrant_client()
     if not qdrant_client.collection_exists(QDRANT_COLLECTION_NAME):
-        print("Tworzę kolekcję")
+        logger.info("Tworzę kolekcję")
         qdrant_client.create_collection(
             collection_name=QDRANT_COLLECTION_NAME,
             vectors_config=VectorParams(
                 size=EMBEDDING_DIM,
                 distance=Distance.COSINE,
+                # Pełne wektory na dysku (mmap); w RAM zostaje tylko ich skwantyzowana kopia
+                on_disk=True,
+            ),
+            on_disk_payload=True,
+            optimizers_config=OptimizersConfigDiff(
+                memmap_threshold=QDRANT_MEMMAP_THRESHOLD,
+                indexing_threshold=QDRANT_MEMMAP_THRESHOLD,
+            ),
+            hnsw_config=HnswConfigDiff(
+                m=HNSW_M,
+                ef_construct=HNSW_EF_CONSTRUCT,
+                full_scan_threshold=10000,
+            ),
+            # Kwantyzacja int8: ~4x mniej pamięci na wektory i szybsze liczenie odległości
+            quantization_config=ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True,
+                ),
             ),
         )
     else:
-        print("Kolekcja już istnieje")
+        logger.info("Kolekcja już istnieje")
+
+def create_embeddings_with_retry(openai_client, texts):
+    """Wywołuje embeddings.create, ponawiając próbę z wykładniczym opóźnieniem przy HTTP 429."""
+    # Moduł openai jest już załadowany - openai_client powstał w get_openai_client_for_key
+    from openai import RateLimitError
+    # Ponawianiem przy 429 zajmuje się wyłącznie ta pętla - bez tego ponowienia SDK (max_retries) mnożyłyby się z naszymi
+    openai_client = openai_client.with_options(max_retries=0)
+    for attempt in range(EMBEDDING_MAX_RETRIES):
+        try:
+            return openai_client.embeddings.create(
+                input=texts,
+                model=EMBEDDING_MODEL,
+                dimensions=EMBEDDING_DIM,
+            )
+        except RateLimitError as e:
+            if attempt == EMBEDDING_MAX_RETRIES - 1:
+                raise
+            # Jeśli API podało Retry-After, czekamy dokładnie tyle; w przeciwnym razie 1s, 2s, 4s...
+            try:
+                delay = float(e.response.headers.get("retry-after"))
+            except (TypeError, ValueError):
+                delay = 2 ** attempt
+            time.sleep(delay + random.uniform(0, 0.5))
 
-def get_embedding(text):
+def request_embeddings(texts: list[str]) -> list[list[float]]:
+    """Pobiera osadzenia z OpenAI, wysyłając teksty paczkami po EMBEDDING_BATCH_SIZE."""
     openai_client = get_openai_client()
-    result = openai_client.embeddings.create(
-        input=[text],
-        model=EMBEDDING_MODEL,
-        dimensions=EMBEDDING_DIM,
-    )
-    return result.data[0].embedding
+    offsets = range(0, len(texts), EMBEDDING_BATCH_SIZE)
+    embeddings = [None] * len(texts)
 
-def add_note_to_db(note_text):
-    qdrant_client = get_qdrant_client()    
-    note_id = str(uuid.uuid4())
+    def embed_batch(offset):
+        batch = texts[offset:offset + EMBEDDING_BATCH_SIZE]
+        result = create_embeddings_with_retry(openai_client, batch)
+        embeddings[offset:offset + len(batch)] = [item.embedding for item in result.data]
+
+    if len(offsets) == 1:
+        embed_batch(0)
+    else:
+        with ThreadPoolExecutor(max_workers=min(EMBEDDING_CONCURRENCY, len(offsets))) as executor:
+            for future in [executor.submit(embed_batch, offset) for offset in offsets]:
+                future.result()
+    return embeddings
+
+def embedding_cache_key(text):
+    return md5(f"{EMBEDDING_MODEL}|{EMBEDDING_DIM}|{text}".encode()).hexdigest()
+
+def get_embeddings(texts: list[str]) -> list[list[float]]:
+    """Zwraca osadzenia dla listy tekstów; do OpenAI trafiają tylko teksty, których nie ma w pamięci sesji."""
+    cache = st.session_state.setdefault("_embedding_cache", {})
+    keys = [embedding_cache_key(text) for text in texts]
+    missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in cache))
+    if missing:
+        for text, embedding in zip(missing, request_embeddings(missing)):
+            cache[embedding_cache_key(text)] = embedding
+    embeddings = [cache[key] for key in keys]
+    trim_cache(cache, EMBEDDING_CACHE_MAX_ENTRIES)
+    return embeddings
+
+def get_embedding(text):
+    return get_embeddings([text])[0]
+
+def add_notes_to_db(note_texts: list[str]):
+    """Zapisuje wiele notatek naraz: jedno zapytanie o osadzenia i jeden upsert."""
+    qdrant_client = get_qdrant_client()
+    vectors = get_embeddings(note_texts)
     qdrant_client.upsert(
         collection_name=QDRANT_COLLECTION_NAME,
         points=[
             PointStruct(
-                id=note_id, # Użycie nowego, unikalnego ID
-                vector=get_embedding(text=note_text),
+                id=str(uuid.uuid4()), # Użycie nowego, unikalnego ID (bez liczenia punktów w kolekcji)
+                vector=vector,
                 payload={
                     "text": note_text,
                 },
             )
+            for note_text, vector in zip(note_texts, vectors)
         ],
     )
+    # Zapamiętane wyniki wyszukiwania nie zawierają nowych notatek
+    list_notes_from_db.clear()
+
+def add_note_to_db(note_text):
+    add_notes_to_db([note_text])
+
+def search_result_label(note):
+    """Krótka etykieta wyniku wyszukiwania: początek notatki i score."""
+    text_short = note["text"][:60].replace("\n", " ") + ("..." if len(note["text"]) > 60 else "")
+    score = f" (score: {note['score']})" if note["score"] is not None else ""
+    return text_short + score
 
 def delete_note_from_db(note_id: str):
     """Usuwa notatkę z bazy Qdrant na podstawie jej unikalnego ID."""
@@ -93,34 +430,975 @@ def delete_note_from_db(note_id: str):
         collection_name=QDRANT_COLLECTION_NAME,
         points_selector=[note_id],
     )
-    print(f"Usunięto notatkę o ID: {note_id}")
+    logger.info("Usunięto notatkę o ID: %s", note_id)
+    list_notes_from_db.clear()
 
+# To samo zapytanie w ciągu NOTES_CACHE_TTL_SECONDS nie odpytuje ponownie embeddings ani Qdranta; zapis i usuwanie notatki czyszczą cache
+@st.cache_data(ttl=NOTES_CACHE_TTL_SECONDS, show_spinner=False, max_entries=64)
 def list_notes_from_db(query=None):
     qdrant_client = get_qdrant_client()
+    # Zapytanie z samych spacji (np. przypadkowy Enter) nie powinno kosztować wywołania embeddings
+    query = (query or "").strip()
     if not query:
-        notes = qdrant_client.scroll(collection_name=QDRANT_COLLECTION_NAME, limit=15)[0]
-        result = []
-        for note in notes:
-            result.append({
-                "id": note.id,
-                "text": note.payload["text"],
-                "score": None,
-            })
-        return result    
+        # Interfejs potrzebuje tylko payload["text"] - nie pobieramy 3072-wymiarowych wektorów
+        notes, _next_page_offset = qdrant_client.scroll(
+            collection_name=QDRANT_COLLECTION_NAME,
+            limit=NOTES_LIMIT,
+            with_payload=["text"],
+            with_vectors=False,
+        )
+        return [
+            {"id": note.id, "text": note.payload["text"], "score": None}
+            for note in notes
+        ]
     else:
         notes = qdrant_client.search(
             collection_name=QDRANT_COLLECTION_NAME,
             query_vector=get_embedding(text=query),
-            limit=15,
+            limit=NOTES_LIMIT,
+            with_payload=["text"],
+            with_vectors=False,
+            # Kandydaci wybierani na wektorach int8, a ostateczny ranking liczony na oryginalnych
+            search_params=SearchParams(
+                hnsw_ef=HNSW_EF_SEARCH,
+                quantization=QuantizationSearchParams(
+                    ignore=False,
+                    rescore=True,
+                    oversampling=2.0,
+                ),
+            ),
+        )
+        return [
+            {"id": note.id, "text": note.payload["text"], "score": note.score}
+            for note in notes
+        ]
+
+#
+# Sekcja trwałej pamięci odpowiedzi GPT-4o
+#
+@st.cache_resource
+def init_response_cache():
+    # Tabela tworzona raz na proces; przy okazji usuwamy przeterminowane wpisy.
+    # "with db" zatwierdza tylko transakcję - połączenie zamyka dopiero closing
+    with closing(sqlite3.connect(RESPONSE_CACHE_PATH)) as db, db:
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "scope TEXT NOT NULL, key TEXT NOT NULL, content TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (scope, key))"
+        )
+        db.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - RESPONSE_CACHE_TTL_SECONDS,))
+    return RESPONSE_CACHE_PATH
+
+def response_cache_scope():
+    """Skrót klucza API bieżącej sesji - odpowiedzi (a więc i niezapisane notatki) nie trafiają do innych użytkowników."""
+    return sha256(st.session_state["openai_api_key"].encode()).hexdigest()
+
+def response_cache_lookup(key):
+    with closing(sqlite3.connect(init_response_cache())) as db, db:
+        row = db.execute(
+            "SELECT content FROM responses WHERE scope = ? AND key = ? AND created_at >= ?",
+            (response_cache_scope(), key, time.time() - RESPONSE_CACHE_TTL_SECONDS),
+        ).fetchone()
+    return row[0] if row else None
+
+def response_cache_store(key, content):
+    with closing(sqlite3.connect(init_response_cache())) as db, db:
+        db.execute(
+            "INSERT OR REPLACE INTO responses (scope, key, content, created_at) VALUES (?, ?, ?, ?)",
+            (response_cache_scope(), key, content, time.time()),
         )
-        result = []
-        for note in notes:
-            result.append({
-                "id": note.id,
-                "text": note.payload["text"],
-                "score": note.score,
-            })
-        return result
+
+def clear_response_cache(all_scopes=False):
+    """Usuwa odpowiedzi zapamiętane dla klucza API bieżącej sesji, a przy all_scopes=True - wszystkie."""
+    with closing(sqlite3.connect(init_response_cache())) as db, db:
+        if all_scopes:
+            db.execute("DELETE FROM responses")
+        else:
+            db.execute("DELETE FROM responses WHERE scope = ?", (response_cache_scope(),))
+
+def completion_cache_key(messages, model="gpt-4o"):
+    """Klucz odpowiedzi: model, prompt systemowy i tekst - różniące się choćby jednym słowem teksty mają różne klucze.
+
+    Normalizujemy tylko końce linii i białe znaki na brzegach tekstu, więc poprawka nie gubi zmian w treści ani akapitach.
+    """
+    contents = (message["content"].replace("\r\n", "\n").strip() for message in messages)
+    return sha256("\x1f".join([model, *contents]).encode()).hexdigest()
+
+def inputs_digest(*inputs):
+    return sha256("\x1f".join(inputs).encode()).hexdigest()
+
+def result_is_current(result_key, digest):
+    """True, gdy wynik pod result_key istnieje i powstał z danych wejściowych o skrócie digest."""
+    state = st.session_state
+    return bool(state.get(result_key)) and state.get(f"_{result_key}_inputs") == digest
+
+def mark_result_current(result_key, digest):
+    st.session_state[f"_{result_key}_inputs"] = digest
+
+def translation_inputs_digest(text, lang_prompt, model, pipeline=False):
+    """Skrót danych wejściowych tłumaczenia - ten sam dla przycisku zakładki i tłumaczeń zbiorczych."""
+    return inputs_digest(text, lang_prompt, model, "pipeline" if pipeline else "")
+
+def tts_inputs_digest(text, voice, audio_format):
+    return inputs_digest(text, voice, audio_format)
+
+def cached_chat_completion(messages, text, model="gpt-4o"):
+    """Odpowiedź GPT-4o na identyczne zapytanie (model, prompt i tekst) bierze z pamięci sesji lub trwałej pamięci, resztę strumieniuje z API.
+
+    Zwraca (odpowiedź, finish_reason); odpowiedź z pamięci ma finish_reason None.
+    """
+    # Ponowne kliknięcie bez edycji tekstu obsługujemy z pamięci sesji - bez zapytania do bazy
+    cache = st.session_state.setdefault("_completion_cache", {})
+    key = completion_cache_key(messages, model)
+    if key in cache:
+        return cache[key], None
+    # Wyszukanie po kluczu to lokalne zapytanie SQLite - strumień odpowiedzi startuje bez dodatkowego zapytania do API
+    content = response_cache_lookup(key)
+    if content is None:
+        content, finish_reason = stream_chat_completion(messages, max_tokens=completion_max_tokens(text), model=model)
+        # Pustej (np. przerwany strumień) ani uciętej na limicie max_tokens odpowiedzi nie zapamiętujemy
+        if not content or finish_reason == "length":
+            return content, finish_reason
+        response_cache_store(key, content)
+    cache[key] = content
+    trim_cache(cache, COMPLETION_CACHE_MAX_ENTRIES)
+    return content, None
+
+#
+# Sekcja tłumaczeń i syntezy mowy
+#
+VOICE_OPTIONS = ("alloy", "onyx", "echo", "fable", "nova", "shimmer")
+
+TTS_STREAM_CHUNK_SIZE = 16 * 1024
+
+TTS_PIPELINE_CONCURRENCY = 4
+
+# Długie teksty (od TTS_CHUNKED_MIN_CHARS znaków) syntezujemy równolegle w grupach zdań po ok. TTS_CHUNK_TARGET_CHARS znaków
+TTS_CHUNKED_MIN_CHARS = 1000
+TTS_CHUNK_TARGET_CHARS = 400
+
+# Opus (w kontenerze Ogg) jest przy tej samej jakości mowy 2-3 razy mniejszy od MP3; "mp3" dla przeglądarek bez obsługi Ogg
+TTS_AUDIO_FORMAT = env.get("TTS_AUDIO_FORMAT") or "opus"
+
+# Tylko formaty, które przeglądarka potrafi odtworzyć (np. nie surowe "pcm") - inaczej wracamy do Opus
+if TTS_AUDIO_FORMAT not in AUDIO_MIME_TYPES:
+    logger.warning("Nieobsługiwany TTS_AUDIO_FORMAT=%r, używam \"opus\"", TTS_AUDIO_FORMAT)
+    TTS_AUDIO_FORMAT = "opus"
+
+# Jakość nagrań do wyboru w panelu bocznym: mniejszy plik to szybsze pobranie z OpenAI i odtworzenie w przeglądarce
+TTS_QUALITY_FORMATS = {
+    "Szybka (Opus)": "opus",
+    "Zrównoważona (MP3)": "mp3",
+    "Zrównoważona (AAC)": "aac",
+    "Bezstratna (FLAC)": "flac",
+    "Najwyższa (WAV)": "wav",
+}
+
+TTS_QUALITY_LABELS = tuple(TTS_QUALITY_FORMATS)
+
+# Domyślnie zaznaczona jest jakość odpowiadająca TTS_AUDIO_FORMAT - każdy akceptowany format (AUDIO_MIME_TYPES) ma swoją opcję
+TTS_DEFAULT_QUALITY_INDEX = list(TTS_QUALITY_FORMATS.values()).index(TTS_AUDIO_FORMAT)
+
+TTS_CACHE_DIR = env.get("TTS_CACHE_DIR") or "./tts_cache"
+
+TTS_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+TRANSLATION_CACHE_MAX_ENTRIES = 128
+
+# Długie notatki (od TRANSLATION_SHARD_MIN_CHARS znaków) tłumaczymy równolegle w częściach po akapitach
+TRANSLATION_SHARD_MIN_CHARS = 2000
+TRANSLATION_SHARD_TARGET_CHARS = 1000
+TRANSLATION_MAX_SHARDS = 8
+
+PARAGRAPH_BOUNDARY = re.compile(r"\n\s*\n")
+
+# Jak często (najwyżej) pytamy Batch API o stan zleconej paczki tłumaczeń
+BATCH_POLL_INTERVAL_SECONDS = 30
+
+# Koniec zdania: znak .!?; i następujący po nim biały znak
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;])\s+")
+
+# Lista języków obsługiwanych przez TTS-1 (OpenAI, stan na czerwiec 2024)
+# Kod języka: (nazwa wyświetlana, prompt do GPT, voice_hint)
+TTS_LANGUAGES = {
+    "en": ("English", "angielski", "alloy"),  # alloy, onyx, echo, fable, nova, shimmer
+    "de": ("German", "niemiecki", "echo"),
+    "es": ("Spanish", "hiszpański", "fable"),
+    "fr": ("French", "francuski", "nova"),
+    "it": ("Italian", "włoski", "onyx"),
+    "pt": ("Portuguese", "portugalski", "shimmer"),
+    "pl": ("Polish", "polski", "alloy"),
+    "tr": ("Turkish", "turecki", "alloy"),
+    "hi": ("Hindi", "hindi", "alloy"),
+    "ja": ("Japanese", "japoński", "alloy"),
+    "ko": ("Korean", "koreański", "alloy"),
+    "zh": ("Chinese", "chiński uproszczony", "alloy"),
+    # Dodaj inne języki obsługiwane przez TTS-1 jeśli pojawią się w przyszłości
+}
+
+# Opcje i etykiety wyboru języka liczone raz, a nie przy każdym przebiegu skryptu
+TTS_LANGUAGE_CODES = tuple(TTS_LANGUAGES)
+
+TTS_LANGUAGE_LABELS = {code: f"{names[0]} ({code})" for code, names in TTS_LANGUAGES.items()}
+
+def available_note_versions(source_prefix=""):
+    """Zwraca {etykieta: klucz session_state} dla niepustych wersji notatki (lub wyszukanej notatki)."""
+    note_noun = "wyszukanej notatki" if source_prefix else "notatki"
+    versions = {
+        f"Pierwsza wersja {note_noun}": f"{source_prefix}note_text",
+        f"Druga wersja {note_noun} (poprawiona przez GPT-4o)": f"{source_prefix}note_text_corrected",
+    }
+    state = st.session_state
+    return {label: key for label, key in versions.items() if state.get(key)}
+
+def translation_system_prompt(lang_prompt):
+    return f"Jesteś tłumaczem. Przetłumacz poniższy tekst na {lang_prompt}, zachowując sens i styl oryginału."
+
+def synthesize_speech(openai_client, text, voice, model="tts-1"):
+    """Syntezuje mowę strumieniowo i zwraca bajty MP3; bez session_state, więc można ją wołać z wątków.
+
+    Zawsze MP3, bo nagrania kolejnych zdań są sklejane - ramki MP3 można łączyć, a strumieni Ogg przeglądarki nie odtwarzają poprawnie.
+    """
+    audio_buffer = BytesIO()
+    started = time.perf_counter()
+    # Odbieramy MP3 kawałkami w miarę generowania, zamiast czekać na całą odpowiedź w pamięci SDK
+    with openai_client.audio.speech.with_streaming_response.create(
+        model=model,
+        voice=voice,
+        input=text,
+        response_format="mp3",
+    ) as response:
+        for chunk in log_time_to_first_token(response.iter_bytes(TTS_STREAM_CHUNK_SIZE), started, model):
+            audio_buffer.write(chunk)
+    return audio_buffer.getvalue()
+
+def current_tts_audio_format():
+    """Format nagrań TTS wybrany w panelu bocznym, a bez wyboru - TTS_AUDIO_FORMAT."""
+    return TTS_QUALITY_FORMATS.get(st.session_state.get("tts_audio_quality"), TTS_AUDIO_FORMAT)
+
+def tts_cache_path(text, voice, model="tts-1", audio_format=TTS_AUDIO_FORMAT):
+    """Ścieżka pliku nagrania w dyskowej pamięci TTS - ten sam tekst i głos (także z różnych zakładek) dzielą jeden plik."""
+    digest = sha256(f"{model}|{voice}|{audio_format}|{text}".encode()).hexdigest()
+    return os.path.join(TTS_CACHE_DIR, f"{digest}.{audio_format}")
+
+def tts_audio_mime_type(audio_path):
+    return AUDIO_MIME_TYPES[os.path.splitext(audio_path)[1].lstrip(".")]
+
+def clear_tts_cache():
+    # Pliki *.part należą do trwających właśnie syntez (także innych sesji) - ich usunięcie przerwałoby os.replace w finish_tts_audio
+    if os.path.isdir(TTS_CACHE_DIR):
+        for entry in os.scandir(TTS_CACHE_DIR):
+            if not entry.name.endswith(".part"):
+                os.remove(entry.path)
+
+def prune_tts_cache():
+    # Po przekroczeniu limitu usuwamy najdawniej zmodyfikowane nagrania; pliki *.part trwających syntez pomijamy (jak w clear_tts_cache)
+    entries = []
+    for entry in os.scandir(TTS_CACHE_DIR):
+        if entry.name.endswith(".part"):
+            continue
+        # Inna sesja mogła właśnie usunąć plik (równoległe przycinanie) - wtedy go pomijamy
+        try:
+            file_stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((file_stat.st_mtime, file_stat.st_size, entry.path))
+    entries.sort()
+    total_size = sum(size for _mtime, size, _path in entries)
+    for _mtime, size, path in entries:
+        if total_size <= TTS_CACHE_MAX_BYTES:
+            break
+        total_size -= size
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def new_partial_tts_path():
+    # Zapis do pliku tymczasowego i zamiana nazwy - przerwana synteza nie zostawi uciętego nagrania w pamięci
+    os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+    with NamedTemporaryFile(dir=TTS_CACHE_DIR, suffix=".part", delete=False) as audio_file:
+        return audio_file.name
+
+def discard_partial_tts_audio(partial_path):
+    # Ucięte nagranie (błąd API, przerwany przebieg skryptu) nie czeka na dysku do najbliższego przycinania pamięci TTS
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+
+def finish_tts_audio(partial_path, text, voice, model="tts-1", audio_format=TTS_AUDIO_FORMAT):
+    audio_path = tts_cache_path(text, voice, model, audio_format)
+    os.replace(partial_path, audio_path)
+    prune_tts_cache()
+    return audio_path
+
+def store_tts_audio(text, voice, write_audio, model="tts-1", audio_format=TTS_AUDIO_FORMAT):
+    """Zapisuje nagranie do dyskowej pamięci TTS; write_audio(ścieżka) tworzy plik. Zwraca ścieżkę nagrania."""
+    partial_path = new_partial_tts_path()
+    try:
+        write_audio(partial_path)
+    except BaseException:
+        # Także wyjątki sterujące Streamlita (st.rerun, st.stop), które dziedziczą z BaseException
+        discard_partial_tts_audio(partial_path)
+        raise
+    return finish_tts_audio(partial_path, text, voice, model, audio_format)
+
+def write_audio_chunks(audio_chunks):
+    """Zwraca funkcję dla store_tts_audio dopisującą kolejne kawałki nagrania do pliku."""
+    def write_audio(audio_path):
+        with open(audio_path, "wb") as audio_file:
+            for chunk in audio_chunks:
+                audio_file.write(chunk)
+    return write_audio
+
+def tts_sentence_groups(text):
+    """Dzieli tekst na grupy kolejnych zdań o długości co najmniej TTS_CHUNK_TARGET_CHARS (poza ostatnią)."""
+    groups, current = [], ""
+    for sentence in SENTENCE_BOUNDARY.split(text.strip()):
+        current = f"{current} {sentence}" if current else sentence
+        if len(current) >= TTS_CHUNK_TARGET_CHARS:
+            groups.append(current)
+            current = ""
+    if current:
+        groups.append(current)
+    return groups
+
+def tts_audio(text, voice, model="tts-1"):
+    """Zwraca ścieżkę nagrania z dyskowej pamięci TTS, syntezując je tylko przy jego braku.
+
+    Długi tekst jest syntezowany równolegle w grupach zdań, a nagrania grup są sklejane w jeden plik MP3.
+    """
+    groups = tts_sentence_groups(text) if len(text) >= TTS_CHUNKED_MIN_CHARS else [text]
+    # Sklejać można tylko ramki MP3 - nagrania w częściach zawsze są w MP3
+    audio_format = "mp3" if len(groups) > 1 else current_tts_audio_format()
+    audio_path = tts_cache_path(text, voice, model, audio_format)
+    # Ponowne "Wygeneruj audio" dla tego samego tekstu i głosu (także po restarcie aplikacji) nie wysyła zapytania do OpenAI
+    if os.path.exists(audio_path):
+        return audio_path
+
+    if len(groups) > 1:
+        openai_client = get_openai_client()
+        with ThreadPoolExecutor(max_workers=TTS_PIPELINE_CONCURRENCY) as executor:
+            # map zwraca nagrania w kolejności grup, więc plik powstaje, zanim skończą się ostatnie syntezy
+            audio_chunks = executor.map(lambda group: synthesize_speech(openai_client, group, voice, model), groups)
+            return store_tts_audio(text, voice, write_audio_chunks(audio_chunks), model, audio_format)
+
+    def write_audio(partial_path):
+        started = time.perf_counter()
+        # Nagranie trafia prosto z sieci do pliku - w pamięci (i w session_state) trzymamy tylko ścieżkę
+        with get_openai_client().audio.speech.with_streaming_response.create(
+            model=model,
+            voice=voice,
+            input=text,
+            response_format=audio_format,
+        ) as response, open(partial_path, "wb") as audio_file:
+            # Jak przy czacie logujemy czas do pierwszych bajtów audio - to on decyduje o odczuwalnym opóźnieniu TTS
+            for chunk in log_time_to_first_token(response.iter_bytes(TTS_STREAM_CHUNK_SIZE), started, model):
+                audio_file.write(chunk)
+
+    return store_tts_audio(text, voice, write_audio, model, audio_format)
+
+def stream_tts(text, voice, state_key):
+    """Syntezuje mowę (lub bierze ją z pamięci) i zapisuje ścieżkę pliku nagrania w session_state pod state_key."""
+    digest = tts_inputs_digest(text, voice, current_tts_audio_format())
+    # To samo nagranie dla tego samego tekstu i głosu - nawet bez sprawdzania pamięci TTS
+    if result_is_current(state_key, digest) and os.path.exists(st.session_state[state_key]):
+        st.toast("Tekst i głos się nie zmieniły - nagranie jest aktualne.")
+        return
+    st.session_state[state_key] = tts_audio(text, voice)
+    mark_result_current(state_key, digest)
+
+def translation_cache_key(text, lang_prompt, model):
+    return md5(f"{model}|{lang_prompt}|{text}".encode()).hexdigest()
+
+def remember_translation(text, lang_prompt, translation, model):
+    cache = st.session_state.setdefault("_translation_cache", {})
+    cache[translation_cache_key(text, lang_prompt, model)] = translation
+    trim_cache(cache, TRANSLATION_CACHE_MAX_ENTRIES)
+
+def translation_shards(text):
+    """Dzieli długi tekst na co najwyżej TRANSLATION_MAX_SHARDS części złożonych z całych akapitów; krótki zwraca w całości."""
+    paragraphs = [paragraph for paragraph in PARAGRAPH_BOUNDARY.split(text) if paragraph.strip()]
+    total_size = sum(len(paragraph) for paragraph in paragraphs)
+    if len(paragraphs) < 2 or total_size < TRANSLATION_SHARD_MIN_CHARS:
+        return [text]
+    # Każda pełna część ma co najmniej target_size znaków, więc części nie będzie więcej niż TRANSLATION_MAX_SHARDS
+    target_size = max(total_size / TRANSLATION_MAX_SHARDS, TRANSLATION_SHARD_TARGET_CHARS)
+    shards, current, current_size = [], [], 0
+    for paragraph in paragraphs:
+        current.append(paragraph)
+        current_size += len(paragraph)
+        if current_size >= target_size:
+            shards.append(current)
+            current, current_size = [], 0
+    # Niepełna końcówka jest osobną częścią, chyba że limit części jest już wyczerpany
+    if current:
+        if len(shards) >= TRANSLATION_MAX_SHARDS:
+            shards[-1].extend(current)
+        else:
+            shards.append(current)
+    return ["\n\n".join(shard) for shard in shards]
+
+async def translate_shards(api_key, shards, lang_prompt, model):
+    async with new_async_openai_client(api_key) as openai_client:
+        return await asyncio.gather(*[translate_one(openai_client, shard, lang_prompt, model) for shard in shards])
+
+def translate_text(text, lang_prompt):
+    """Tłumaczy tekst strumieniowo; powtórne tłumaczenie tego samego tekstu na ten sam język bierze z pamięci sesji.
+
+    Długi, wieloakapitowy tekst jest dzielony na części tłumaczone równolegle (bez podglądu na żywo).
+    """
+    model = current_translation_model()
+    cached = st.session_state.get("_translation_cache", {}).get(translation_cache_key(text, lang_prompt, model))
+    if cached is not None:
+        return cached
+    shards = translation_shards(text)
+    if len(shards) > 1:
+        with st.spinner(f"Tłumaczenie {len(shards)} części notatki równolegle..."):
+            translation = "\n\n".join(asyncio.run(translate_shards(st.session_state["openai_api_key"], shards, lang_prompt, model)))
+    else:
+        translation, finish_reason = cached_chat_completion([
+            {"role": "system", "content": translation_system_prompt(lang_prompt)},
+            {"role": "user", "content": text},
+        ], text, model)
+        # Uciętego tłumaczenia nie zapamiętujemy - kolejne kliknięcie spróbuje ponownie
+        if finish_reason == "length":
+            return translation
+    remember_translation(text, lang_prompt, translation, model)
+    return translation
+
+def translate_with_pipelined_tts(messages, voice):
+    """Tłumaczy strumieniowo i już w trakcie wysyła do TTS każdą gotową grupę zdań; zwraca (tłumaczenie, ścieżka mp3).
+
+    Nagrania grup są dopisywane do pliku w kolejności zdań - ramki MP3 można łączyć bez dekodowania.
+    Gdy synteza się nie powiedzie, ścieżka to None - gotowego (i opłaconego) tłumaczenia nie tracimy.
+    """
+    openai_client = get_openai_client()
+    with ThreadPoolExecutor(max_workers=TTS_PIPELINE_CONCURRENCY) as executor:
+        futures = []
+        translation, _finish_reason = stream_chat_completion(
+            messages,
+            model=current_translation_model(),
+            max_tokens=completion_max_tokens(messages[-1]["content"]),
+            on_sentence=lambda sentence: futures.append(
+                executor.submit(synthesize_speech, openai_client, sentence, voice)
+            ),
+        )
+        try:
+            audio_path = store_tts_audio(
+                translation, voice, write_audio_chunks(future.result() for future in futures), audio_format="mp3"
+            )
+        except Exception:
+            logger.exception("tts-1: synteza zdań tłumaczenia nie powiodła się")
+            audio_path = None
+    return translation, audio_path
+
+async def translate_one(openai_client, text, lang_prompt, model=TRANSLATION_MODEL):
+    response = await openai_client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": translation_system_prompt(lang_prompt)},
+            {"role": "user", "content": text},
+        ],
+        max_tokens=completion_max_tokens(text),
+    )
+    warn_if_truncated(response.choices[0].finish_reason, model)
+    return response.choices[0].message.content
+
+async def speak_one(openai_client, text, voice, audio_format=TTS_AUDIO_FORMAT):
+    # Nagranie z dyskowej pamięci TTS nie jest syntezowane ponownie
+    audio_path = tts_cache_path(text, voice, audio_format=audio_format)
+    if os.path.exists(audio_path):
+        return audio_path
+    partial_path = new_partial_tts_path()
+    # Jak w pozostałych ścieżkach TTS: nagranie płynie kawałkami z sieci do pliku, bez buforowania całości w pamięci
+    try:
+        async with openai_client.audio.speech.with_streaming_response.create(
+            model="tts-1",
+            voice=voice,
+            input=text,
+            response_format=audio_format,
+        ) as response:
+            await response.stream_to_file(partial_path, chunk_size=TTS_STREAM_CHUNK_SIZE)
+    except BaseException:
+        discard_partial_tts_audio(partial_path)
+        raise
+    return finish_tts_audio(partial_path, text, voice, audio_format=audio_format)
+
+async def translate_and_speak_one(openai_client, text, lang_prompt, voice, speak=True, translation=None, audio_format=TTS_AUDIO_FORMAT, model=TRANSLATION_MODEL):
+    # Synteza mowy rusza zaraz po tłumaczeniu na dany język - nie czeka na tłumaczenia na pozostałe języki
+    if translation is None:
+        translation = await translate_one(openai_client, text, lang_prompt, model)
+    audio_path = await speak_one(openai_client, translation, voice, audio_format) if speak else None
+    return translation, audio_path
+
+async def translate_and_speak(api_key, jobs, speak=True, known_translations=None, audio_format=TTS_AUDIO_FORMAT, model=TRANSLATION_MODEL):
+    """Dla listy (tekst, język w prompcie, głos) równolegle tłumaczy i syntezuje mowę - każdy język niezależnie od pozostałych.
+
+    known_translations (równoległa do jobs, None = brak) pozwala pominąć tłumaczenia znane już z pamięci sesji.
+    Zwraca listę (tłumaczenie, ścieżka nagrania) w kolejności jobs; przy speak=False ścieżka to None.
+    """
+    known_translations = known_translations or [None] * len(jobs)
+    # Klient asynchroniczny żyje tylko w obrębie jednej pętli zdarzeń (asyncio.run), więc nie trafia do cache
+    async with new_async_openai_client(api_key) as openai_client:
+        return await asyncio.gather(*[
+            translate_and_speak_one(openai_client, text, lang_prompt, voice, speak, translation, audio_format, model)
+            for (text, lang_prompt, voice), translation in zip(jobs, known_translations)
+        ])
+
+def translate_in_one_call(text, lang_prompts, model=TRANSLATION_MODEL):
+    """Tłumaczy tekst na kilka języków jednym zapytaniem (odpowiedź JSON); lang_prompts to {kod: język w prompcie}.
+
+    Zwraca {kod: tłumaczenie} albo None, gdy odpowiedź nie zawiera wszystkich tłumaczeń.
+    """
+    languages = ", ".join(f'"{code}" ({lang_prompt})' for code, lang_prompt in lang_prompts.items())
+    response = get_openai_client().chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": (
+                "Jesteś tłumaczem. Przetłumacz poniższy tekst na każdy z podanych języków, zachowując sens i styl oryginału. "
+                f"Zwróć wyłącznie obiekt JSON, w którym kluczami są kody języków, a wartościami tłumaczenia: {languages}."
+            )},
+            {"role": "user", "content": text},
+        ],
+        response_format={"type": "json_object"},
+        max_tokens=completion_max_tokens(text, languages=len(lang_prompts)),
+    )
+    warn_if_truncated(response.choices[0].finish_reason, model)
+    try:
+        translations = json.loads(response.choices[0].message.content)
+    except (TypeError, ValueError):
+        translations = None
+    if not isinstance(translations, dict) or not all(isinstance(translations.get(code), str) for code in lang_prompts):
+        logger.warning("%s: niepełna odpowiedź JSON z tłumaczeniami, tłumaczymy osobno", model)
+        return None
+    return {code: translations[code] for code in lang_prompts}
+
+def tab_default_voice(lang_code, source_prefix=""):
+    """Domyślny głos zakładki: dla "any" - głos podpowiadany dla wybranego języka (voice_hint z TTS_LANGUAGES)."""
+    if lang_code != "any":
+        return VOICE_OPTIONS[0]
+    any_lang_code = st.session_state.get(f"{source_prefix}target_language_select", TTS_LANGUAGE_CODES[0])
+    return TTS_LANGUAGES[any_lang_code][2]
+
+def tab_voice(lang_code, source_prefix=""):
+    """Głos z selectboxa zakładki (jeśli był już pokazany), inaczej domyślny."""
+    return st.session_state.get(f"{source_prefix}tts_voice_select_{lang_code}") or tab_default_voice(lang_code, source_prefix)
+
+def tab_translation_jobs(note_versions, source_prefix, specs):
+    """Zwraca (jobs, kod języka zakładki "any"), gdzie jobs to lista (tekst, język w prompcie, głos) dla kolejnych specs."""
+    jobs = []
+    any_lang_code = None
+    for _header, lang_code, lang_prompt, *_labels in specs:
+        # Ustawienia (wersja notatki, język, głos) bierzemy z widżetów zakładki, a przy ich braku - domyślne
+        selected_note = st.session_state.get(f"{source_prefix}translation_note_select_{lang_code}")
+        if selected_note not in note_versions:
+            selected_note = next(iter(note_versions))
+        if lang_code == "any":
+            any_lang_code = st.session_state.get(f"{source_prefix}target_language_select", TTS_LANGUAGE_CODES[0])
+            lang_prompt = TTS_LANGUAGES[any_lang_code][1]
+        voice = tab_voice(lang_code, source_prefix)
+        jobs.append((st.session_state[note_versions[selected_note]], lang_prompt, voice))
+    return jobs, any_lang_code
+
+def store_tab_translation(lang_code, text, lang_prompt, translation, model, source_prefix="", any_lang_code=None):
+    remember_translation(text, lang_prompt, translation, model)
+    translated_key = f"{source_prefix}translated_text_{lang_code}"
+    st.session_state[translated_key] = translation
+    # Skrót opisuje tekst, który faktycznie przetłumaczono - np. paczka zlecona dla wcześniejszej wersji notatki
+    # nie zablokuje przycisku "Przetłumacz" dla bieżącej
+    mark_result_current(translated_key, translation_inputs_digest(text, lang_prompt, model))
+    if lang_code == "any":
+        st.session_state[f"{source_prefix}translated_lang_code"] = any_lang_code
+
+def prefetch_fixed_language_translations(text):
+    """Tłumaczy tekst naraz na języki wszystkich zakładek BR/US/PL (jedno zapytanie JSON) i zapisuje wyniki w pamięci tłumaczeń.
+
+    Kolejne zakładki biorą wtedy tłumaczenie tego tekstu z pamięci, bez zapytania do API.
+    """
+    # Długie notatki tłumaczymy w częściach - trzy tłumaczenia w jednej odpowiedzi mogłyby przekroczyć limit tokenów
+    if len(text) >= TRANSLATION_SHARD_MIN_CHARS:
+        return
+    lang_prompts = {spec[1]: spec[2] for spec in TRANSLATION_TAB_SPECS if spec[1] in FIXED_LANGUAGE_TAB_CODES}
+    model = current_translation_model()
+    cache = st.session_state.get("_translation_cache", {})
+    if all(translation_cache_key(text, lang_prompt, model) in cache for lang_prompt in lang_prompts.values()):
+        return
+    with st.spinner("Tłumaczenie na BR/US/PL jednym zapytaniem..."):
+        translations = translate_in_one_call(text, lang_prompts, model)
+    if translations is not None:
+        for lang_code, translation in translations.items():
+            remember_translation(text, lang_prompts[lang_code], translation, model)
+
+def translate_all_tabs(note_versions, source_prefix="", lang_codes=None, speak=True):
+    """Obsługuje przyciski tłumaczenia wszystkich zakładek naraz - wyniki trafiają do stanu każdej z zakładek.
+
+    lang_codes ogranicza zakładki (domyślnie wszystkie), a speak=False pomija syntezę mowy.
+    """
+    specs = [spec for spec in TRANSLATION_TAB_SPECS if lang_codes is None or spec[1] in lang_codes]
+    jobs, any_lang_code = tab_translation_jobs(note_versions, source_prefix, specs)
+    model = current_translation_model()
+    audio_format = current_tts_audio_format()
+
+    results = None
+    texts = {text for text, _lang_prompt, _voice in jobs}
+    if not speak and len(texts) == 1:
+        # Ta sama wersja notatki we wszystkich zakładkach: jedno zapytanie zamiast kilku - tekst i instrukcje idą raz
+        translations = translate_in_one_call(
+            texts.pop(), {spec[1]: lang_prompt for spec, (_text, lang_prompt, _voice) in zip(specs, jobs)}, model
+        )
+        if translations is not None:
+            results = [(translations[spec[1]], None) for spec in specs]
+    if results is None:
+        # Wszystko zbieramy przed asyncio.run, a stan sesji zapisujemy dopiero po gather - korutyny go nie dotykają
+        cache = st.session_state.get("_translation_cache", {})
+        known_translations = [cache.get(translation_cache_key(text, lang_prompt, model)) for text, lang_prompt, _voice in jobs]
+        results = asyncio.run(translate_and_speak(
+            st.session_state["openai_api_key"], jobs, speak=speak, known_translations=known_translations,
+            audio_format=audio_format, model=model,
+        ))
+
+    for (_header, lang_code, *_rest), (text, lang_prompt, voice), (translation, audio_path) in zip(specs, jobs, results):
+        store_tab_translation(lang_code, text, lang_prompt, translation, model, source_prefix, any_lang_code)
+        if audio_path is not None:
+            tts_audio_key = f"{source_prefix}tts_{lang_code}_audio"
+            st.session_state[tts_audio_key] = audio_path
+            mark_result_current(tts_audio_key, tts_inputs_digest(translation, voice, audio_format))
+
+def submit_translation_batch(note_versions, source_prefix=""):
+    """Zleca tłumaczenia wszystkich zakładek przez Batch API (taniej, wynik w ciągu do 24 h) i zapamiętuje paczkę w sesji."""
+    jobs, any_lang_code = tab_translation_jobs(note_versions, source_prefix, TRANSLATION_TAB_SPECS)
+    model = current_translation_model()
+    requests = [
+        json.dumps({
+            "custom_id": lang_code,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model,
+                "messages": [
+                    {"role": "system", "content": translation_system_prompt(lang_prompt)},
+                    {"role": "user", "content": text},
+                ],
+                "max_tokens": completion_max_tokens(text),
+            },
+        })
+        for (_header, lang_code, *_rest), (text, lang_prompt, _voice) in zip(TRANSLATION_TAB_SPECS, jobs)
+    ]
+    openai_client = get_openai_client()
+    batch_file = openai_client.files.create(
+        file=("tlumaczenia.jsonl", "\n".join(requests).encode()),
+        purpose="batch",
+    )
+    batch = openai_client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    logger.info("Zlecono paczkę tłumaczeń %s", batch.id)
+    st.session_state[f"{source_prefix}pending_batch"] = {
+        "id": batch.id,
+        "jobs": {spec[1]: (text, lang_prompt) for spec, (text, lang_prompt, _voice) in zip(TRANSLATION_TAB_SPECS, jobs)},
+        "any_lang_code": any_lang_code,
+        "model": model,
+        "checked_at": time.time(),
+    }
+
+def poll_translation_batch(source_prefix=""):
+    """Sprawdza (co najwyżej raz na BATCH_POLL_INTERVAL_SECONDS) zleconą paczkę tłumaczeń i po jej ukończeniu wpisuje wyniki do zakładek."""
+    pending_key = f"{source_prefix}pending_batch"
+    pending = st.session_state.get(pending_key)
+    if pending is None:
+        return
+    if time.time() - pending["checked_at"] < BATCH_POLL_INTERVAL_SECONDS:
+        st.caption("Paczka tłumaczeń jest przetwarzana w tle.")
+        return
+    from openai import APIError
+    openai_client = get_openai_client()
+    # Czas sprawdzenia zapisujemy przed zapytaniem - przy awarii API kolejna próba i tak nastąpi dopiero po BATCH_POLL_INTERVAL_SECONDS
+    pending["checked_at"] = time.time()
+    try:
+        batch = openai_client.batches.retrieve(pending["id"])
+        output_text = None
+        if batch.status == "completed" and batch.output_file_id:
+            output_text = openai_client.files.content(batch.output_file_id).text
+    except APIError as e:
+        logger.warning("Paczka %s: nie udało się sprawdzić stanu: %s", pending["id"], e)
+        st.caption("Nie udało się teraz sprawdzić paczki tłumaczeń - spróbujemy ponownie przy kolejnej interakcji.")
+        return
+    if batch.status in ("failed", "expired", "cancelled") or (batch.status == "completed" and not batch.output_file_id):
+        del st.session_state[pending_key]
+        st.error(f"Paczka tłumaczeń nie została wykonana (status: {batch.status}).")
+        return
+    if batch.status != "completed":
+        st.caption(f"Paczka tłumaczeń jest przetwarzana w tle (status: {batch.status}).")
+        return
+
+    for line in output_text.splitlines():
+        result = json.loads(line)
+        response = result.get("response") or {}
+        if response.get("status_code") != 200:
+            logger.warning("Paczka %s: brak tłumaczenia dla %s", pending["id"], result.get("custom_id"))
+            continue
+        lang_code = result["custom_id"]
+        text, lang_prompt = pending["jobs"][lang_code]
+        translation = response["body"]["choices"][0]["message"]["content"]
+        store_tab_translation(lang_code, text, lang_prompt, translation, pending["model"], source_prefix, pending["any_lang_code"])
+    del st.session_state[pending_key]
+    st.toast("Paczka tłumaczeń gotowa", icon="✅")
+
+def sync_text_area(widget_key, state_key):
+    st.session_state[state_key] = st.session_state[widget_key]
+
+def persistent_text_area(label, state_key):
+    """text_area, którego tekst leży pod zwykłym kluczem state_key, a nie pod kluczem widżetu.
+
+    Streamlit usuwa stan widżetu, który nie został narysowany w danym przebiegu (np. zakładka tłumaczenia
+    bez wersji notatki) - tekst pod state_key przetrwa to i nadal jest widoczny dla czatu i tłumaczeń.
+    """
+    widget_key = f"{state_key}_area"
+    # Przed utworzeniem widżetu wpisujemy do niego bieżącą wartość - także ustawioną programowo (tłumaczenie, transkrypcja)
+    st.session_state[widget_key] = st.session_state.get(state_key, "")
+    return st.text_area(label, key=widget_key, on_change=sync_text_area, args=(widget_key, state_key))
+
+@st.fragment
+def render_translation_tab(header, lang_code, lang_prompt, translate_label, result_label, tts_label, note_versions, source_prefix=""):
+    """Rysuje jedną zakładkę tłumaczenia (wybór wersji notatki, tłumaczenie, edycja, synteza mowy).
+
+    Zakładka jest fragmentem: kliknięcia w niej przerysowują tylko ją, a nie pozostałe zakładki i czat.
+
+    source_prefix="" obsługuje notatkę z zakładki "Dodaj notatkę", a "search_" - wyszukaną notatkę.
+    note_versions to wynik available_note_versions(source_prefix), liczony raz dla wszystkich zakładek.
+    Dla lang_code="any" użytkownik sam wybiera język docelowy, a lang_prompt i result_label są ustalane na bieżąco.
+    """
+    # Lokalny uchwyt do stanu sesji - zakładka czyta go kilkanaście razy na przebieg, a rysowanych jest osiem zakładek
+    state = st.session_state
+    note_noun = "wyszukanej notatki" if source_prefix else "notatki"
+    translated_key = f"{source_prefix}translated_text_{lang_code}"
+    tts_audio_key = f"{source_prefix}tts_{lang_code}_audio"
+
+    st.header(header)
+    if lang_code == "any":
+        st.write(f"Wybierz wersję {note_noun} oraz język docelowy do tłumaczenia:")
+    else:
+        st.write(f"Wybierz wersję {note_noun} do tłumaczenia:")
+
+    if not note_versions:
+        if source_prefix:
+            st.info("Brak wersji wyszukanej notatki do tłumaczenia. Edytuj lub popraw notatkę powyżej.")
+        else:
+            st.info("Brak notatek do tłumaczenia. Dodaj lub popraw notatkę w zakładce 'Dodaj notatkę'.")
+        return
+
+    # Wybór wersji notatki
+    selected_note = st.radio(
+        "Wersja notatki:",
+        list(note_versions),
+        key=f"{source_prefix}translation_note_select_{lang_code}"
+    )
+
+    # Pobierz wybrany tekst
+    text_to_translate = state[note_versions[selected_note]]
+
+    if lang_code == "any":
+        # Wybór języka docelowego
+        # Opcją jest sam kod języka - etykieta jest tylko formatowaniem
+        selected_lang_code = st.selectbox(
+            "Wybierz język docelowy do tłumaczenia:",
+            TTS_LANGUAGE_CODES,
+            format_func=TTS_LANGUAGE_LABELS.__getitem__,
+            key=f"{source_prefix}target_language_select"
+        )
+        lang_prompt = TTS_LANGUAGES[selected_lang_code][1]
+
+    pipeline_tts = st.checkbox(
+        "Generuj audio już w trakcie tłumaczenia (zdanie po zdaniu)",
+        key=f"{source_prefix}tts_pipeline_{lang_code}"
+    )
+
+    # Przycisk tłumaczenia
+    translate_clicked = st.button(translate_label, key=f"{source_prefix}translate_{lang_code}")
+    digest = translation_inputs_digest(text_to_translate, lang_prompt, current_translation_model(), pipeline_tts)
+    if translate_clicked and result_is_current(translated_key, digest):
+        # Tekst i język bez zmian - zostawiamy bieżące tłumaczenie razem z ręcznymi poprawkami
+        st.toast("Tekst się nie zmienił - tłumaczenie jest aktualne.")
+    elif translate_clicked:
+        if pipeline_tts:
+            messages = [
+                {"role": "system", "content": translation_system_prompt(lang_prompt)},
+                {"role": "user", "content": text_to_translate},
+            ]
+            # Głos z selectboxa poniżej (jeśli był już pokazany), inaczej domyślny
+            voice = tab_voice(lang_code, source_prefix)
+            state[translated_key], audio_path = translate_with_pipelined_tts(messages, voice)
+            if audio_path is None:
+                st.warning("Nie udało się wygenerować audio - tłumaczenie jest gotowe, audio możesz wygenerować przyciskiem poniżej.")
+            else:
+                state[tts_audio_key] = audio_path
+                # Nagranie zdań jest zawsze w MP3
+                mark_result_current(tts_audio_key, tts_inputs_digest(state[translated_key], voice, "mp3"))
+        else:
+            if lang_code in FIXED_LANGUAGE_TAB_CODES and state.get(f"{source_prefix}translation_prefetch"):
+                prefetch_fixed_language_translations(text_to_translate)
+            state[translated_key] = translate_text(text_to_translate, lang_prompt)
+        mark_result_current(translated_key, digest)
+        if lang_code == "any":
+            state[f"{source_prefix}translated_lang_code"] = selected_lang_code
+
+    if translated_key not in state:
+        return
+
+    # Pole do edycji tłumaczenia
+    if lang_code == "any":
+        translated_lang_code = state.get(f"{source_prefix}translated_lang_code", TTS_LANGUAGE_CODES[0])
+        result_label = f"Tłumaczenie na {TTS_LANGUAGES.get(translated_lang_code, ('Wybrany język',))[0]} (możesz edytować):"
+    persistent_text_area(result_label, translated_key)
+
+    # Wybór głosu do syntezy mowy
+    selected_voice = st.selectbox(
+        "Wybierz typ/rodzaj głosu do syntezy mowy:",
+        options=VOICE_OPTIONS,
+        index=VOICE_OPTIONS.index(tab_default_voice(lang_code, source_prefix)),
+        key=f"{source_prefix}tts_voice_select_{lang_code}"
+    )
+
+    # Przycisk do generowania audio z tłumaczenia
+    if st.button(tts_label, key=f"{source_prefix}tts_{lang_code}"):
+        stream_tts(state[translated_key], selected_voice, tts_audio_key)
+
+    # Odtwarzacz audio, jeśli audio zostało wygenerowane
+    # st.audio sam wczytuje plik ze ścieżki; pomijamy nagrania, których plik tymczasowy już usunięto
+    audio_path = state.get(tts_audio_key)
+    if audio_path and os.path.exists(audio_path):
+        st.audio(audio_path, format=tts_audio_mime_type(audio_path))
+
+# Specyfikacje zakładek tłumaczeń:
+# (nagłówek, kod, język w prompcie, etykieta tłumaczenia, etykieta wyniku, etykieta TTS)
+TRANSLATION_TAB_SPECS = (
+    ("🇬🇧 Tłumaczenie na British English", "br", "brytyjski angielski",
+     "Przetłumacz na brytyjski angielski",
+     "Tłumaczenie na BR ENG (możesz edytować):",
+     "Wygeneruj audio z tłumaczenia na British English"),
+    ("🇺🇸 Tłumaczenie na American English", "us", "amerykański angielski",
+     "Przetłumacz na amerykański angielski",
+     "Tłumaczenie na US ENG (możesz edytować):",
+     "Wygeneruj audio z tłumaczenia na American English"),
+    ("🇵🇱 Tłumaczenie na Polski", "pl", "język polski",
+     "Przetłumacz na polski",
+     "Tłumaczenie na polski (możesz edytować):",
+     "Wygeneruj audio z tłumaczenia na polski"),
+    # Język i etykieta wyniku zakładki "any" zależą od wyboru użytkownika
+    ("🌍 Tłumaczenie na wybrany język", "any", None,
+     "Przetłumacz na wybrany język",
+     None,
+     "Wygeneruj audio z tłumaczenia na wybrany język"),
+)
+
+TRANSLATION_TAB_HEADERS = [spec[0] for spec in TRANSLATION_TAB_SPECS]
+
+# Zakładki ze stałym językiem docelowym (bez "any")
+FIXED_LANGUAGE_TAB_CODES = tuple(spec[1] for spec in TRANSLATION_TAB_SPECS if spec[2] is not None)
+
+def render_translation_tabs(source_prefix=""):
+    """Tworzy cztery zakładki tłumaczeń dla notatki (source_prefix="") lub wyszukanej notatki ("search_")."""
+    note_versions = available_note_versions(source_prefix)
+    # Wyniki paczki wpisujemy przed narysowaniem pól tłumaczeń - wtedy pola pokazują je już w tym przebiegu
+    poll_translation_batch(source_prefix)
+    if note_versions:
+        st.checkbox(
+            "Przy pierwszym tłumaczeniu na BR/US/PL przetłumacz od razu na wszystkie trzy (jedno zapytanie)",
+            key=f"{source_prefix}translation_prefetch",
+        )
+        col_translate_all, col_speak_all, col_batch = st.columns(3)
+        with col_translate_all:
+            # Tłumaczenia BR/US/PL jednym zapytaniem JSON (lub równolegle, gdy zakładki tłumaczą różne wersje notatki)
+            if st.button("Przetłumacz na wszystkie (BR/US/PL)", key=f"{source_prefix}translate_all"):
+                translate_all_tabs(note_versions, source_prefix, lang_codes=FIXED_LANGUAGE_TAB_CODES, speak=False)
+        with col_speak_all:
+            # Wszystkie tłumaczenia i nagrania jednym kliknięciem: dwie rundy równoległych zapytań zamiast ośmiu po kolei
+            if st.button("Przetłumacz i zsyntetyzuj wszystkie", key=f"{source_prefix}translate_speak_all"):
+                translate_all_tabs(note_versions, source_prefix)
+        with col_batch:
+            # Tłumaczenia bez pośpiechu przez Batch API - o połowę taniej, wyniki pojawią się przy kolejnej interakcji
+            if st.button(
+                "Wygeneruj paczkę tłumaczeń w tle",
+                key=f"{source_prefix}translate_batch",
+                disabled=f"{source_prefix}pending_batch" in st.session_state,
+            ):
+                submit_translation_batch(note_versions, source_prefix)
+                st.toast("Paczka tłumaczeń zlecona", icon="⏳")
+    for spec, tab in zip(TRANSLATION_TAB_SPECS, st.tabs(TRANSLATION_TAB_HEADERS)):
+        with tab:
+            render_translation_tab(*spec, note_versions, source_prefix=source_prefix)
+
+#
+# Sekcja statycznych tekstów panelu bocznego
+#
+ABOUT_APP_MD = '''
+                    Aplikacja "🌍 Pomocnik Językowy" została stworzona przede wszystkim po to, aby wspierać pracę nad tekstem, bardzo przyspieszając ten proces oraz poprawiając błędy, w tym gramatyczne i stylistyczne. Możemy tutaj dowolnie usprawniać tekst i przetwarzać go, zaczynając od nagrywania notatek audio. To znacznie przyspiesza pracę, ponieważ następnie możemy te nagrania transkrybować na tekst, a później poprawiać go za pomocą czatu GPT. Proces ten jest bardzo szybki. Dodatkowo możemy tłumaczyć ten tekst na różne języki. Jeśli to nie wystarcza, możemy nawet odsłuchać przetworzone notatki, generując audio w wybranych językach, a nawet wykorzystać je jako załącznik do wiadomości e-mail lub w różnego rodzaju komunikatorach. To nie wszystko; zapisane notatki możemy wyszukiwać semantycznie, co jest bardzo pomocne, gdy mamy ich sto lub więcej, a nie zawsze pamiętamy jakiej dokładnie frazy użyć do wyszukiwania - możemy użyć innych słów opisujących to czego szukamy. Na koniec, z nowymi lub odnalezionymi notatkami możemy pracować z ChatGPT-4o, przetwarzając je dowolnie. Połączenie tych wszystkich funkcji w jednej przestrzeni aplikacji znacznie przyspiesza pracę nad różnorodnym tekstem, od e-maili w różnych językach i stylach po różne formy wyrazu, takie jak wpisy na social media itp. - to jest potężne narzędzie do pracy nad tekstem
+                    '''
+
+FUNCTIONALITY_MD = '''
+        Aplikacja "🌍 Pomocnik Językowy" umożliwia nagrywanie notatek audio, ich transkrypcję na tekst, poprawę tekstu przez model GPT-4o oraz tłumaczenie na różne języki wraz z utworzeniem wersji audio tych tłumaczeń, aby m.in. móc załączyć je do wiadomości e-mail lub innych komunikatorów. Notatki można również wyszukiwać semantycznie w bazie danych, a także rozmawiać o nich z ChatGPT-4o w różnych językach, dowolnie przekształcając ich treść i styl w zależności od potrzeb – sky is the limit
+        ### Główne funkcjonalności:
+        - Nagrywanie notatek audio lub wprowadzanie tekstu ręcznie/wklejenie
+        - Transkrypcja audio na tekst
+        - Poprawa tekstu przez model GPT-4o
+        - Tłumaczenie na różne języki
+        - Generowanie mowy z tekstu do audio
+        - Rozmowa z modelem GPT-4o w odniesieniu do notatek
+        - Zapisywanie notatek w wektorowej bazie danych Qdrant    
+        - Semantyczne wyszukiwanie notatek w bazie danych Qdrant         
+        '''
+
+TECHNOLOGIES_MD = '''
+                    ### Zastosowane Technologie i modele AI:
+        - OpenAI "**whisper-1**" do transkrypcji audio            
+        - OpenAI "**GPT-4o**" do poprawy tekstu, tłumaczenia i dalszej dowolnej obróbki tekstu z ChatGPT-4o
+        - OpenAI "**GPT-4o-mini**" jako domyślny, szybszy model tłumaczeń (GPT-4o do wyboru w panelu bocznym)
+        - OpenAI "**text-embedding-3-large**" do tworzenia osadzeń tekstu
+        - OpenAI "**tts-1**" do syntezy mowy
+        - **Qdrant** jako baza danych wektorowych do przechowywania i semantycznego wyszukiwania notatek
+        - **Python** i jego biblioteka **Streamlit** jako framework do budowy interfejsu użytkownika
+        - i najważniejsza technologia umysłu autora umożliwiająca łączenie złożonych światów ludzkich idei i myśli z potężnymi możliwościami nowoczesnej sztucznej inteligencji - zmierzamy w kierunku tworzenia coraz większych efektów synergii między ludźmi a AI, celem zwiększenia produktywności i kreatywności w tempie wykładniczym
+        '''
+
+BEGINNER_TIPS_MD = '''
+                    - Ta wersja aplikacji służy jedynie **do testowania**. Warto przetwarzać w niej tylko teksty przeznaczone do publicznej wiadomości. Nie zalecam, a wręcz **odradzam korzystanie z tej wersji aplikacji do przetwarzania osobistych, prywatnych lub służbowych treści**, ponieważ po pierwsze, są one przetwarzane przez AI (co wymaga dbałości o bezpieczeństwo cyfrowe), a po drugie, po zapisaniu notatek inni użytkownicy również mogą je widzieć aż do momentu ich usunięcia (można samodzielnie usunąć notatkę z bazy danych za pomocą przycisku **"Usuń notatkę"**). Notatki będą systematycznie usuwane z pamięci, ale nie należy ryzykować potencjalnego wycieku poufnych danych, gdyż wystarczy chwila publicznej ekspozycji. Zasady bezpieczeństwa cyfrowego są oczywiście ogólnie znane każdemu użytkownikowi internetu, ale tego typu ostrzeżeń nigdy za wiele.
+                    - Wszystkie edytowalne pola tekstowe można rozszerzać, przeciągając ich dolny prawy róg - w ten sposób można wygodniej edytować i porównywać dłuższe teksty
+                    - Pole paska bocznego można poszerzać lub zmniejszać, przeciągając jego prawą krawędź - w ten sposób można wygodniej wybierać opcje i czytać informacje
+                    - Pole paska bocznego można też schować lub pokazywać, klikając ikonę strzałki w lewym górnym rogu aplikacji - w ten sposób można zwiększyć przestrzeń roboczą głównego obszaru aplikacji
+                    - Po transkrypcji audio na tekst, tekst można dalej edytować ręcznie, a następnie zapisać jego aktualną formę
+                    - Zwróć uwagę na podpowiedzi w polach tekstowych po dokonaniu edycji tekstu ("press Enter to apply"; "press Ctrl+Enter to apply") aby zachować zmiany w tym polu tekstowym do dalszych akcji
+                    '''
+
+LIMITATIONS_MD = '''
+                    - **Obecna forma aplikacji pomaga zademonstrować potencjał współpracy z AI** oraz umożliwia prace ad hoc, ale nie służy do stałego przechowywania danych. Mimo to, aplikacja na tym etapie pozwala na pobieranie wygenerowanych plików audio oraz kopiowanie tekstów do plików tekstowych, takich jak txt czy docx. - **warto ją traktować jako bazę wyjściową do konfiguracji rozwiązań uszytych na miarę potrzeb użytkownika**
+                    - **Zapisane** notatki są widoczne dla innych użytkowników, więc rekomenduję przetwarzanie tylko **publicznych** treści. Notatki należy **ręcznie usuwać** z bazy danych po zakończeniu pracy z nimi. Notatki będą systematycznie usuwane z pamięci, ale nie należy ryzykować potencjalnego wycieku poufnych danych, gdyż wystarczy chwila publicznej ekspozycji
+                    - Brak możliwości zapisywania notatek do pliku np. .txt (istnieje możliwość uzupełnienia tej funkcjonalności)
+                    - Brak możliwości edytowania notatek po ich zapisaniu, ale można je wyszukiwać i ponownie przetwarzać, a następnie zapisać jej nową formę jako kolejną notatkę
+                    - Aplikacja jest skierowana do polskiego użytkownika, ale AI myśli w uniwersalnym języku, więc można z nią już teraz rozmawiać/pracować w różnych językach. W przyszłości jej interfejs można łatwo przetłumaczyć na inny język - ba, sama umie to zrobić (przetłumaczyć dobrze tekst).
+                    '''
+
+CONTACT_MD = '''
+                    - Zapraszam do współpracy i kontaktu poprzez LinkedIn: www.linkedin.com/in/krzysztof-bożek-59830b95
+                     
+                    '''
+
+SIDEBAR_INFO_SECTIONS = (
+    ("O aplikacji i jej zastosowaniu", ABOUT_APP_MD),
+    ("Informacje o funkcjonalności i założeniach zastosowanych w aplikacji", FUNCTIONALITY_MD),
+    ("Zastosowane technologie i modele AI", TECHNOLOGIES_MD),
+    ("Przydatne podpowiedzi dla początkujących użytkowników", BEGINNER_TIPS_MD),
+    ("Ograniczenia aplikacji", LIMITATIONS_MD),
+    ("Kontakt z autorem aplikacji", CONTACT_MD),
+)
+
+def render_sidebar_info():
+    """Rysuje statyczne sekcje informacyjne panelu bocznego (wywoływać wewnątrz `with st.sidebar:`)."""
+    st.markdown("**Informacje o aplikacji:**")
+    for title, body in SIDEBAR_INFO_SECTIONS:
+        with st.expander(title):
+            st.markdown(body)
 
 #
 # MAIN
@@ -176,8 +1454,8 @@ if not st.session_state.get("openai_api_key"):
     st.stop()
 
 # Session state initialization
-if "note_audio_bytes_md5" not in st.session_state:
-    st.session_state["note_audio_bytes_md5"] = None
+if "note_audio_fingerprint" not in st.session_state:
+    st.session_state["note_audio_fingerprint"] = None
 
 if "note_audio_bytes" not in st.session_state:
     st.session_state["note_audio_bytes"] = None
@@ -204,8 +1482,60 @@ st.sidebar.button(
     on_click=toggle_chat
 )
 
-# Lista dostępnych źródeł tekstu do rozmowy
-text_sources = {
+def clear_response_caches():
+    """Czyści odpowiedzi API zapamiętane przez bieżącą sesję: poprawy, tłumaczenia i odnośniki do jej nagrań TTS.
+
+    Pliki nagrań, transkrypcje i wyniki wyszukiwania są wspólne dla wszystkich sesji - czyści je clear_shared_caches.
+    """
+    state = st.session_state
+    for cache_key in ("_completion_cache", "_translation_cache"):
+        state.pop(cache_key, None)
+    # Także skróty wejść (mark_result_current) - inaczej przycisk z tymi samymi danymi nadal nic by nie robił
+    for state_key in [key for key in state if key.startswith("_") and key.endswith("_inputs")]:
+        del state[state_key]
+    clear_response_cache()
+    # Zapominamy tylko odnośniki do nagrań - ten sam plik (tekst i głos) może odtwarzać inna sesja,
+    # a miejsce na dysku zwalniają prune_tts_cache i clear_shared_caches
+    for state_key in [key for key in state if key.startswith(("tts_", "search_tts_")) and key.endswith("_audio")]:
+        del state[state_key]
+    st.toast("Pamięć podręczna wyczyszczona", icon="🧹")
+
+def clear_shared_caches():
+    """Czyści pamięć wspólną dla wszystkich sesji procesu: odpowiedzi wszystkich kluczy API, nagrania TTS, transkrypcje i wyniki wyszukiwania."""
+    clear_response_caches()
+    clear_response_cache(all_scopes=True)
+    clear_tts_cache()
+    transcribe_audio.clear()
+    list_notes_from_db.clear()
+
+# Np. po zmianie promptów albo gdy zapamiętana odpowiedź okazała się zła - kolejne kliknięcia pytają API od nowa
+st.sidebar.button(
+    "Wyczyść pamięć podręczną odpowiedzi",
+    on_click=clear_response_caches
+)
+
+# Pamięć wspólna dla wszystkich użytkowników - przycisk tylko dla administratora (CACHE_ADMIN=1 w .env)
+if env.get("CACHE_ADMIN") == "1":
+    st.sidebar.button(
+        "Wyczyść pamięć podręczną wszystkich użytkowników",
+        on_click=clear_shared_caches
+    )
+
+st.sidebar.selectbox(
+    "Jakość nagrań audio:",
+    TTS_QUALITY_LABELS,
+    index=TTS_DEFAULT_QUALITY_INDEX,
+    key="tts_audio_quality"
+)
+
+# Tłumaczenia przez gpt-4o-mini są kilka razy szybsze i tańsze; przy trudniejszych tekstach można wrócić do gpt-4o
+st.sidebar.checkbox(
+    "Tłumacz dokładniejszym modelem GPT-4o (wolniej i drożej)",
+    key="translation_high_quality"
+)
+
+# Lista dostępnych źródeł tekstu do rozmowy: {etykieta: klucz session_state}
+CHAT_TEXT_SOURCES = {
     "Pierwsza wersja notatki": "note_text",
     "Druga wersja notatki (poprawiona)": "note_text_corrected",
     "Tłumaczenie na BR ENG": "translated_text_br",
@@ -221,1674 +1551,350 @@ text_sources = {
     "Tłumaczenie wyszukanej na wybrany język": "search_translated_text_any",
 }
 
+CHAT_TEXT_SOURCE_LABELS = tuple(CHAT_TEXT_SOURCES)
+
 if st.session_state.chat_active:
     st.sidebar.markdown("**Wybierz tekst do rozmowy z ChatGPT-4o:**")
     st.session_state.chat_text_source = st.sidebar.selectbox(
         "Źródło tekstu:",
-        list(text_sources.keys()),
+        CHAT_TEXT_SOURCE_LABELS,
         key="chat_text_source_select"
     )
-st.sidebar.markdown("**Informacje o aplikacji:**")
-with st.sidebar.expander("O aplikacji i jej zastosowaniu"):
-        st.markdown('''
-                    Aplikacja "🌍 Pomocnik Językowy" została stworzona przede wszystkim po to, aby wspierać pracę nad tekstem, bardzo przyspieszając ten proces oraz poprawiając błędy, w tym gramatyczne i stylistyczne. Możemy tutaj dowolnie usprawniać tekst i przetwarzać go, zaczynając od nagrywania notatek audio. To znacznie przyspiesza pracę, ponieważ następnie możemy te nagrania transkrybować na tekst, a później poprawiać go za pomocą czatu GPT. Proces ten jest bardzo szybki. Dodatkowo możemy tłumaczyć ten tekst na różne języki. Jeśli to nie wystarcza, możemy nawet odsłuchać przetworzone notatki, generując audio w wybranych językach, a nawet wykorzystać je jako załącznik do wiadomości e-mail lub w różnego rodzaju komunikatorach. To nie wszystko; zapisane notatki możemy wyszukiwać semantycznie, co jest bardzo pomocne, gdy mamy ich sto lub więcej, a nie zawsze pamiętamy jakiej dokładnie frazy użyć do wyszukiwania - możemy użyć innych słów opisujących to czego szukamy. Na koniec, z nowymi lub odnalezionymi notatkami możemy pracować z ChatGPT-4o, przetwarzając je dowolnie. Połączenie tych wszystkich funkcji w jednej przestrzeni aplikacji znacznie przyspiesza pracę nad różnorodnym tekstem, od e-maili w różnych językach i stylach po różne formy wyrazu, takie jak wpisy na social media itp. - to jest potężne narzędzie do pracy nad tekstem
-                    ''')
-
-with st.sidebar.expander("Informacje o funkcjonalności i założeniach zastosowanych w aplikacji"):
-        st.markdown('''
-        Aplikacja "🌍 Pomocnik Językowy" umożliwia nagrywanie notatek audio, ich transkrypcję na tekst, poprawę tekstu przez model GPT-4o oraz tłumaczenie na różne języki wraz z utworzeniem wersji audio tych tłumaczeń, aby m.in. móc załączyć je do wiadomości e-mail lub innych komunikatorów. Notatki można również wyszukiwać semantycznie w bazie danych, a także rozmawiać o nich z ChatGPT-4o w różnych językach, dowolnie przekształcając ich treść i styl w zależności od potrzeb – sky is the limit
-        ### Główne funkcjonalności:
-        - Nagrywanie notatek audio lub wprowadzanie tekstu ręcznie/wklejenie
-        - Transkrypcja audio na tekst
-        - Poprawa tekstu przez model GPT-4o
-        - Tłumaczenie na różne języki
-        - Generowanie mowy z tekstu do audio
-        - Rozmowa z modelem GPT-4o w odniesieniu do notatek
-        - Zapisywanie notatek w wektorowej bazie danych Qdrant    
-        - Semantyczne wyszukiwanie notatek w bazie danych Qdrant         
-        ''')
-with st.sidebar.expander("Zastosowane technologie i modele AI"):
-        st.markdown('''
-                    ### Zastosowane Technologie i modele AI:
-        - OpenAI "**whisper-1**" do transkrypcji audio            
-        - OpenAI "**GPT-4o**" do poprawy tekstu, tłumaczenia i dalszej dowolnej obróbki tekstu z ChatGPT-4o
-        - OpenAI "**text-embedding-3-large**" do tworzenia osadzeń tekstu
-        - OpenAI "**tts-1**" do syntezy mowy
-        - **Qdrant** jako baza danych wektorowych do przechowywania i semantycznego wyszukiwania notatek
-        - **Python** i jego biblioteka **Streamlit** jako framework do budowy interfejsu użytkownika
-        - i najważniejsza technologia umysłu autora umożliwiająca łączenie złożonych światów ludzkich idei i myśli z potężnymi możliwościami nowoczesnej sztucznej inteligencji - zmierzamy w kierunku tworzenia coraz większych efektów synergii między ludźmi a AI, celem zwiększenia produktywności i kreatywności w tempie wykładniczym
-        ''')
-with st.sidebar.expander("Przydatne podpowiedzi dla początkujących użytkowników"):
-        st.markdown('''
-                    - Ta wersja aplikacji służy jedynie **do testowania**. Warto przetwarzać w niej tylko teksty przeznaczone do publicznej wiadomości. Nie zalecam, a wręcz **odradzam korzystanie z tej wersji aplikacji do przetwarzania osobistych, prywatnych lub służbowych treści**, ponieważ po pierwsze, są one przetwarzane przez AI (co wymaga dbałości o bezpieczeństwo cyfrowe), a po drugie, po zapisaniu notatek inni użytkownicy również mogą je widzieć aż do momentu ich usunięcia (można samodzielnie usunąć notatkę z bazy danych za pomocą przycisku **"Usuń notatkę"**). Notatki będą systematycznie usuwane z pamięci, ale nie należy ryzykować potencjalnego wycieku poufnych danych, gdyż wystarczy chwila publicznej ekspozycji. Zasady bezpieczeństwa cyfrowego są oczywiście ogólnie znane każdemu użytkownikowi internetu, ale tego typu ostrzeżeń nigdy za wiele.
-                    - Wszystkie edytowalne pola tekstowe można rozszerzać, przeciągając ich dolny prawy róg - w ten sposób można wygodniej edytować i porównywać dłuższe teksty
-                    - Pole paska bocznego można poszerzać lub zmniejszać, przeciągając jego prawą krawędź - w ten sposób można wygodniej wybierać opcje i czytać informacje
-                    - Pole paska bocznego można też schować lub pokazywać, klikając ikonę strzałki w lewym górnym rogu aplikacji - w ten sposób można zwiększyć przestrzeń roboczą głównego obszaru aplikacji
-                    - Po transkrypcji audio na tekst, tekst można dalej edytować ręcznie, a następnie zapisać jego aktualną formę
-                    - Zwróć uwagę na podpowiedzi w polach tekstowych po dokonaniu edycji tekstu ("press Enter to apply"; "press Ctrl+Enter to apply") aby zachować zmiany w tym polu tekstowym do dalszych akcji
-                    ''')
-
-with st.sidebar.expander("Ograniczenia aplikacji"):
-        st.markdown('''
-                    - **Obecna forma aplikacji pomaga zademonstrować potencjał współpracy z AI** oraz umożliwia prace ad hoc, ale nie służy do stałego przechowywania danych. Mimo to, aplikacja na tym etapie pozwala na pobieranie wygenerowanych plików audio oraz kopiowanie tekstów do plików tekstowych, takich jak txt czy docx. - **warto ją traktować jako bazę wyjściową do konfiguracji rozwiązań uszytych na miarę potrzeb użytkownika**
-                    - **Zapisane** notatki są widoczne dla innych użytkowników, więc rekomenduję przetwarzanie tylko **publicznych** treści. Notatki należy **ręcznie usuwać** z bazy danych po zakończeniu pracy z nimi. Notatki będą systematycznie usuwane z pamięci, ale nie należy ryzykować potencjalnego wycieku poufnych danych, gdyż wystarczy chwila publicznej ekspozycji
-                    - Brak możliwości zapisywania notatek do pliku np. .txt (istnieje możliwość uzupełnienia tej funkcjonalności)
-                    - Brak możliwości edytowania notatek po ich zapisaniu, ale można je wyszukiwać i ponownie przetwarzać, a następnie zapisać jej nową formę jako kolejną notatkę
-                    - Aplikacja jest skierowana do polskiego użytkownika, ale AI myśli w uniwersalnym języku, więc można z nią już teraz rozmawiać/pracować w różnych językach. W przyszłości jej interfejs można łatwo przetłumaczyć na inny język - ba, sama umie to zrobić (przetłumaczyć dobrze tekst).
-                    ''')
-with st.sidebar.expander("Kontakt z autorem aplikacji"):
-        st.markdown('''
-                    - Zapraszam do współpracy i kontaktu poprzez LinkedIn: www.linkedin.com/in/krzysztof-bożek-59830b95
-                     
-                    ''')
-
-st.title("Notatki Audio / Tekst do opracowania")
-
-if st.session_state.chat_active:
-    col_main, col_chat = st.columns([1, 1])
-    with col_main:
-
+with st.sidebar:
+    render_sidebar_info()
+
+@st.fragment
+def render_note_recorder():
+    """Nagrywanie i transkrypcja; jako fragment nie odpytuje komponentu nagrywania przy edycji innych pól."""
+    note_audio = audiorecorder(
+        start_prompt="Nagraj notatkę",
+        stop_prompt="Zatrzymaj nagrywanie",
+    )
+    if note_audio:
+        store_note_audio(export_note_audio(note_audio))
 
-        assure_db_collection_exists()
-        add_tab, search_tab = st.tabs(["Dodaj notatkę", "Wyszukaj notatkę"])
+        note_audio_bytes = st.session_state["note_audio_bytes"]
+        st.audio(note_audio_bytes, format=AUDIO_MIME_TYPES[note_audio_format(note_audio_bytes)])
 
-        with add_tab:
-            # --- Sekcja nagrywania i transkrypcji ---
-            note_audio = audiorecorder(
-                start_prompt="Nagraj notatkę",
-                stop_prompt="Zatrzymaj nagrywanie",
+        if st.button("Transkrybuj audio"):
+            transcribed = transcribe_audio(
+                note_audio_bytes,
+                st.session_state["note_audio_fingerprint"],
             )
-            if note_audio:
-                audio = BytesIO()
-                note_audio.export(audio, format="mp3")
-                st.session_state["note_audio_bytes"] = audio.getvalue()
-                current_md5 = md5(st.session_state["note_audio_bytes"]).hexdigest()
-                if st.session_state["note_audio_bytes_md5"] != current_md5:
-                    st.session_state["note_audio_bytes_md5"] = current_md5
-
-                st.audio(st.session_state["note_audio_bytes"], format="audio/mp3")
-
-                if st.button("Transkrybuj audio"):
-                    transcribed = transcribe_audio(st.session_state["note_audio_bytes"])
-                    # Ustaw transkrypcję jako tekst do edycji
-                    st.session_state["note_text"] = transcribed
-                    
-            # --- Pole do edycji notatki (zawsze widoczne) ---
-            st.session_state["note_text"] = st.text_area(
-                "**Pierwsza wersja notatki:** Edytuj notatkę (możesz wpisać, wkleić lub użyć transkrypcji audio, a następnie dalej edytować):",
-                value=st.session_state.get("note_text", ""),
-                key="note_text_area"
-            )
-
-            # --- Sekcja poprawy przez GPT-4o ---
-            if st.button("Popraw notatkę przez ChatGPT-4o"):
-                openai_client = get_openai_client()
-                response = openai_client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {"role": "system", "content": "Jesteś pomocnym asystentem, który wykrywa język przetwarzanego tekstu, a następnie koncentruje się jedynie na poprawie ewentualnych błędów w tym tekście, w tym samym języku: np. jeśli wykryjesz tekst napisany po polsku, popraw zgodnie z zasadami języka polskiego; jeśli wykryjesz tekst napisany po angielsku, popraw zgodnie z zasadami języka angielskiego. Poprawiaj tekst pod względem gramatycznym, stylistycznym, składniowym i ortograficznym. Popraw tylko błędy, nie zmieniaj sensu wypowiedzi."},
-                        {"role": "user", "content": st.session_state["note_text"]},
-                    ],
-                    max_tokens=5000,
-                )
-                st.session_state["note_text_corrected"] = response.choices[0].message.content
-
-            # Wyświetl poprawioną wersję, jeśli istnieje
-            note_to_save = st.session_state.get("note_text", "")
-            if "note_text_corrected" in st.session_state:
-                st.session_state["note_text_corrected"] = st.text_area(
-                    "**Druga wersja notatki:** Poprawiona notatka (możesz edytować):",
-                    value=st.session_state["note_text_corrected"],
-                    key="note_text_corrected_area"
-                )
-                note_to_save = st.session_state["note_text_corrected"]
-
-            # --- Zapis notatki ---
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.session_state.get("note_text", "") and st.button("Zapisz pierwszą wersję notatki"):
-                    add_note_to_db(note_text=st.session_state["note_text"])
-                    st.toast("Pierwsza wersja notatki zapisana", icon="✅")
-            with col2:
-                if "note_text_corrected" in st.session_state and st.session_state["note_text_corrected"]:
-                    if st.button("Zapisz drugą wersję notatki poprawioną przez GPT-4o"):
-                        add_note_to_db(note_text=st.session_state["note_text_corrected"])
-                        st.toast("Druga wersja notatki zapisana", icon="✅")
-                        # Wyczyść poprawioną notatkę po zapisie (opcjonalnie)
-                        # del st.session_state["note_text_corrected"]
-
-            ##### UWAGA -PONIŻEJ KOD, który trzeba wciąć pod add_tab
-            # Tworzenie czterech zakładek
-            tab1, tab2, tab3, tab4 = st.tabs([
-                "🇬🇧 Tłumaczenie na British English", 
-                "🇺🇸 Tłumaczenie na American English", 
-                "🇵🇱 Tłumaczenie na Polski", 
-                "🌍 Tłumaczenie na wybrany język"
-            ])
-
-            with tab1:
-                st.header("🇬🇧 Tłumaczenie na British English")
-                st.write("Wybierz wersję notatki do tłumaczenia:")
-
-                # Wybór wersji notatki
-                note_options = []
-                if st.session_state.get("note_text"):
-                    note_options.append("Pierwsza wersja notatki")
-                if st.session_state.get("note_text_corrected"):
-                    note_options.append("Druga wersja notatki (poprawiona przez GPT-4o)")
-
-                if note_options:
-                    selected_note = st.radio(
-                        "Wersja notatki:",
-                        note_options,
-                        key="translation_note_select"
-                    )
+            st.session_state["note_audio_text"] = transcribed
+            # Ustaw transkrypcję jako tekst do edycji
+            st.session_state["note_text"] = transcribed
+            # Pole edycji notatki leży poza fragmentem - odśwież całą stronę, aby pokazać transkrypcję
+            st.rerun()
 
-                    # Pobierz wybrany tekst
-                    if selected_note == "Pierwsza wersja notatki":
-                        text_to_translate = st.session_state["note_text"]
-                    else:
-                        text_to_translate = st.session_state["note_text_corrected"]
-
-                    # Przycisk tłumaczenia
-                    if st.button("Przetłumacz na brytyjski angielski"):
-                        openai_client = get_openai_client()
-                        response = openai_client.chat.completions.create(
-                            model="gpt-4o",
-                            messages=[
-                                {"role": "system", "content": "Jesteś tłumaczem. Przetłumacz poniższy tekst na brytyjski angielski, zachowując sens i styl oryginału."},
-                                {"role": "user", "content": text_to_translate},
-                            ],
-                            max_tokens=5000,
-                        )
-                        st.session_state["translated_text_br"] = response.choices[0].message.content
-
-                    # Pole do edycji tłumaczenia
-                    if "translated_text_br" in st.session_state:
-                        st.session_state["translated_text_br"] = st.text_area(
-                            "Tłumaczenie na BR ENG (możesz edytować):",
-                            value=st.session_state["translated_text_br"],
-                            key="translated_text_br_area"
-                        )
-
-                        # Wybór głosu do syntezy mowy
-                        voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                        selected_voice = st.selectbox(
-                            "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                            options=voice_options,
-                            key="tts_voice_select"
-                        )
-
-                        # Przycisk do generowania audio z tłumaczenia
-                        if st.button("Wygeneruj audio z tłumaczenia na British English"):
-                            openai_client = get_openai_client()
-                            tts_response = openai_client.audio.speech.create(
-                                model="tts-1",
-                                voice=selected_voice,
-                                input=st.session_state["translated_text_br"]
-                            )
-                            st.session_state["tts_br_audio"] = tts_response.content
-
-                        # Odtwarzacz audio, jeśli audio zostało wygenerowane
-                        if "tts_br_audio" in st.session_state:
-                            st.audio(st.session_state["tts_br_audio"], format="audio/mp3")
-                else:
-                    st.info("Brak notatek do tłumaczenia. Dodaj lub popraw notatkę w zakładce 'Dodaj notatkę'.")
-
-            with tab2:
-                st.header("🇺🇸 Tłumaczenie na American English")
-                st.write("Wybierz wersję notatki do tłumaczenia:")
-
-                note_options = []
-                if st.session_state.get("note_text"):
-                    note_options.append("Pierwsza wersja notatki")
-                if st.session_state.get("note_text_corrected"):
-                    note_options.append("Druga wersja notatki (poprawiona przez GPT-4o)")
-
-                if note_options:
-                    selected_note = st.radio(
-                        "Wersja notatki:",
-                        note_options,
-                        key="translation_note_select_us"
-                    )
+def chat_history_window(chat_history):
+    """Zwraca prompt systemowy i ostatnie CHAT_HISTORY_MAX_TURNS par wiadomości wraz z bieżącym pytaniem."""
+    window_size = 2 * CHAT_HISTORY_MAX_TURNS + 1
+    if chat_history and chat_history[0]["role"] == "system":
+        return chat_history[:1] + chat_history[1:][-window_size:]
+    return chat_history[-window_size:]
+
+def chat_system_message(text_for_chat):
+    """Wiadomość systemowa czatu z wybranym tekstem jako kontekstem; jedyne miejsce, gdzie budujemy ten prompt."""
+    return {
+        "role": "system",
+        "content": f"Jesteś ekspertem językowym. Odpowiadasz na pytania dotyczące wybranego tekstu:\n\n{text_for_chat}"
+    }
+
+def submit_chat_question():
+    """Callback pola pytania: odkłada pytanie do obsłużenia i od razu czyści pole, zanim skrypt się wykona."""
+    st.session_state["chat_pending_question"] = st.session_state["chat_user_input"]
+    st.session_state["chat_user_input"] = ""
+
+def clear_chat_history():
+    st.session_state.chat_history = []
+    st.session_state.pop("_sys_prompt_hash", None)
+    st.session_state["chat_user_input"] = ""
+
+@st.fragment
+def render_chat():
+    """Kolumna rozmowy z ChatGPT-4o; jako fragment przerysowuje się sama, bez zakładek tłumaczeń."""
+    st.subheader("💬 Rozmowa z ChatGPT-4o o wybranym tekście")
+    text_key = CHAT_TEXT_SOURCES[st.session_state.chat_text_source]
+    text_for_chat = st.session_state.get(text_key, "")
+
+    # Jeśli historia jest pusta, ustaw pierwszy prompt z kontekstem
+    if not st.session_state.chat_history and text_for_chat:
+        st.session_state.chat_history.append(chat_system_message(text_for_chat))
+
+    # Zapamiętaj poprzednie źródło tekstu
+    if "prev_chat_text_source" not in st.session_state:
+        st.session_state["prev_chat_text_source"] = st.session_state.chat_text_source
+
+    # Jeśli zmieniono źródło tekstu, zresetuj historię i ustaw nowy systemowy prompt
+    if st.session_state["prev_chat_text_source"] != st.session_state.chat_text_source:
+        st.session_state.chat_history = []
+        st.session_state.pop("_sys_prompt_hash", None)
+        text_key = CHAT_TEXT_SOURCES[st.session_state.chat_text_source]
+        text_for_chat = st.session_state.get(text_key, "")
+        if text_for_chat:
+            st.session_state.chat_history.append(chat_system_message(text_for_chat))
+        st.session_state["prev_chat_text_source"] = st.session_state.chat_text_source
+
+    st.markdown("**Tekst do rozmowy:**")
+    st.write(text_for_chat)
+
+    st.text_input(
+        "Zadaj pytanie dotyczące powyższego tekstu lub poproś o wyjaśnienie, np. 1. Czy tekst jest poprawny pod względem gramatycznym i stylistycznym? Wykonaj analizę. 2. Przekształć tekst na bardziej formalny styl - zaproponuj dwie wersje",
+        key="chat_user_input",
+        on_change=submit_chat_question,
+        # placeholder="Czy tekst jest poprawny pod względem gramatycznym i stylistycznym? Wykonaj analizę"
+    )
+    user_input = st.session_state.pop("chat_pending_question", "")
+
+    if user_input:
+        # --- AKTUALIZUJ SYSTEMOWY PROMPT Z NAJNOWSZYM TEKSTEM (text_for_chat odczytany na początku fragmentu) ---
+        sys_prompt_hash = hash(text_for_chat)
+        # Usuń stary systemowy prompt (jeśli istnieje) - ale tylko gdy tekst zmienił się od ostatniego pytania
+        if st.session_state.chat_history and st.session_state.chat_history[0]["role"] == "system":
+            if st.session_state.get("_sys_prompt_hash") != sys_prompt_hash:
+                st.session_state.chat_history[0] = chat_system_message(text_for_chat)
+        else:
+            st.session_state.chat_history.insert(0, chat_system_message(text_for_chat))
+        st.session_state["_sys_prompt_hash"] = sys_prompt_hash
+
+        st.session_state.chat_history.append({"role": "user", "content": user_input})
+        try:
+            # Do modelu trafia tylko okno ostatnich wiadomości - koszt i czas odpowiedzi nie rosną z długością rozmowy
+            answer, _finish_reason = stream_chat_completion(chat_history_window(st.session_state.chat_history))
+            st.session_state.chat_history.append({"role": "assistant", "content": answer})
+        except Exception as e:
+            answer = f"Błąd komunikacji z OpenAI: {e}"
+            st.session_state.chat_history.append({"role": "assistant", "content": answer})
+
+    # Wyświetl historię rozmowy w dymkach st.chat_message
+    # for msg in reversed(st.session_state.chat_history):
+    for msg in st.session_state.chat_history:
+        if msg["role"] == "system":
+            st.markdown(f"**Kontekst rozmowy:** {msg['content']}")
+        else:
+            with st.chat_message(msg["role"]):
+                st.markdown(msg["content"])
+
+    # Czyszczenie w callbacku - stan jest gotowy przed przebiegiem wywołanym kliknięciem, bez dodatkowego st.rerun()
+    st.button("Wyczyść historię rozmowy", on_click=clear_chat_history)
+
+    # if st.button("Wyczyść historię rozmowy"):
+    #     st.session_state.chat_history = []
+
+# Lokalny uchwyt do stanu sesji - poniższy układ strony odwołuje się do niego kilkadziesiąt razy na przebieg
+ss = st.session_state
+
+def correct_text(text):
+    """Poprawia notatkę przez GPT-4o (z pamięci, jeśli ten sam tekst był już poprawiany) - wspólne dla obu edytorów."""
+    corrected, _finish_reason = cached_chat_completion(
+        messages=[
+            {"role": "system", "content": CORRECTION_SYSTEM_PROMPT},
+            {"role": "user", "content": text},
+        ],
+        text=text,
+    )
+    return corrected
+
+def correct_note_in_state(source_key, corrected_key):
+    """Obsługuje przycisk "Popraw": poprawia tekst spod source_key i zapisuje wynik pod corrected_key."""
+    text = ss[source_key]
+    # Puste pole nie jest wysyłane do GPT-4o
+    if not text.strip():
+        st.info("Wpisz najpierw treść notatki.")
+        return
+    digest = inputs_digest(text)
+    if result_is_current(corrected_key, digest):
+        # Notatka bez zmian od ostatniej poprawy - nie nadpisujemy ręcznych poprawek w drugiej wersji
+        st.toast("Notatka się nie zmieniła - poprawiona wersja jest aktualna.")
+        return
+    ss[corrected_key] = correct_text(text)
+    mark_result_current(corrected_key, digest)
+
+@st.fragment
+def render_add_note_tab():
+    """Zakładka "Dodaj notatkę": nagranie, edycja, poprawa, zapis i tłumaczenia notatki."""
+    # --- Sekcja nagrywania i transkrypcji ---
+    render_note_recorder()
+
+    # --- Pole do edycji notatki (zawsze widoczne) ---
+    persistent_text_area(
+        "**Pierwsza wersja notatki:** Edytuj notatkę (możesz wpisać, wkleić lub użyć transkrypcji audio, a następnie dalej edytować):",
+        "note_text"
+    )
 
-                    if selected_note == "Pierwsza wersja notatki":
-                        text_to_translate = st.session_state["note_text"]
-                    else:
-                        text_to_translate = st.session_state["note_text_corrected"]
-
-                    if st.button("Przetłumacz na amerykański angielski"):
-                        openai_client = get_openai_client()
-                        response = openai_client.chat.completions.create(
-                            model="gpt-4o",
-                            messages=[
-                                {"role": "system", "content": "Jesteś tłumaczem. Przetłumacz poniższy tekst na amerykański angielski, zachowując sens i styl oryginału."},
-                                {"role": "user", "content": text_to_translate},
-                            ],
-                            max_tokens=5000,
-                        )
-                        st.session_state["translated_text_us"] = response.choices[0].message.content
-
-                    if "translated_text_us" in st.session_state:
-                        st.session_state["translated_text_us"] = st.text_area(
-                            "Tłumaczenie na US ENG (możesz edytować):",
-                            value=st.session_state["translated_text_us"],
-                            key="translated_text_us_area"
-                        )
-
-                        voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                        selected_voice_us = st.selectbox(
-                            "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                            options=voice_options,
-                            key="tts_voice_select_us"
-                        )
-
-                        if st.button("Wygeneruj audio z tłumaczenia na American English"):
-                            openai_client = get_openai_client()
-                            tts_response = openai_client.audio.speech.create(
-                                model="tts-1",
-                                voice=selected_voice_us,
-                                input=st.session_state["translated_text_us"]
-                            )
-                            st.session_state["tts_us_audio"] = tts_response.content
-
-                        if "tts_us_audio" in st.session_state:
-                            st.audio(st.session_state["tts_us_audio"], format="audio/mp3")
-                else:
-                    st.info("Brak notatek do tłumaczenia. Dodaj lub popraw notatkę w zakładce 'Dodaj notatkę'.")
-
-            with tab3:
-                st.header("🇵🇱 Tłumaczenie na Polski")
-                st.write("Wybierz wersję notatki do tłumaczenia:")
-
-                note_options = []
-                if st.session_state.get("note_text"):
-                    note_options.append("Pierwsza wersja notatki")
-                if st.session_state.get("note_text_corrected"):
-                    note_options.append("Druga wersja notatki (poprawiona przez GPT-4o)")
-
-                if note_options:
-                    selected_note = st.radio(
-                        "Wersja notatki:",
-                        note_options,
-                        key="translation_note_select_pl"
-                    )
+    # --- Sekcja poprawy przez GPT-4o ---
+    if st.button("Popraw notatkę przez ChatGPT-4o"):
+        correct_note_in_state("note_text", "note_text_corrected")
 
-                    if selected_note == "Pierwsza wersja notatki":
-                        text_to_translate = st.session_state["note_text"]
-                    else:
-                        text_to_translate = st.session_state["note_text_corrected"]
-
-                    if st.button("Przetłumacz na polski"):
-                        openai_client = get_openai_client()
-                        response = openai_client.chat.completions.create(
-                            model="gpt-4o",
-                            messages=[
-                                {"role": "system", "content": "Jesteś tłumaczem. Przetłumacz poniższy tekst na język polski, zachowując sens i styl oryginału."},
-                                {"role": "user", "content": text_to_translate},
-                            ],
-                            max_tokens=5000,
-                        )
-                        st.session_state["translated_text_pl"] = response.choices[0].message.content
-
-                    if "translated_text_pl" in st.session_state:
-                        st.session_state["translated_text_pl"] = st.text_area(
-                            "Tłumaczenie na polski (możesz edytować):",
-                            value=st.session_state["translated_text_pl"],
-                            key="translated_text_pl_area"
-                        )
-
-                        voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                        selected_voice_pl = st.selectbox(
-                            "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                            options=voice_options,
-                            key="tts_voice_select_pl"
-                        )
-
-                        if st.button("Wygeneruj audio z tłumaczenia na polski"):
-                            openai_client = get_openai_client()
-                            tts_response = openai_client.audio.speech.create(
-                                model="tts-1",
-                                voice=selected_voice_pl,
-                                input=st.session_state["translated_text_pl"]
-                            )
-                            st.session_state["tts_pl_audio"] = tts_response.content
-
-                        if "tts_pl_audio" in st.session_state:
-                            st.audio(st.session_state["tts_pl_audio"], format="audio/mp3")
-                else:
-                    st.info("Brak notatek do tłumaczenia. Dodaj lub popraw notatkę w zakładce 'Dodaj notatkę'.")
-
-            with tab4:
-                st.header("🌍 Tłumaczenie na wybrany język")
-                st.write("Wybierz wersję notatki oraz język docelowy do tłumaczenia:")
-
-                # Wersje notatki do wyboru
-                note_options = []
-                if st.session_state.get("note_text"):
-                    note_options.append("Pierwsza wersja notatki")
-                if st.session_state.get("note_text_corrected"):
-                    note_options.append("Druga wersja notatki (poprawiona przez GPT-4o)")
-
-                # Lista języków obsługiwanych przez TTS-1 (OpenAI, stan na czerwiec 2024)
-                # Kod języka: (nazwa wyświetlana, prompt do GPT, voice_hint)
-                tts_languages = {
-                    "en": ("English", "angielski", "alloy"),  # alloy, onyx, echo, fable, nova, shimmer
-                    "de": ("German", "niemiecki", "echo"),
-                    "es": ("Spanish", "hiszpański", "fable"),
-                    "fr": ("French", "francuski", "nova"),
-                    "it": ("Italian", "włoski", "onyx"),
-                    "pt": ("Portuguese", "portugalski", "shimmer"),
-                    "pl": ("Polish", "polski", "alloy"),
-                    "tr": ("Turkish", "turecki", "alloy"),
-                    "hi": ("Hindi", "hindi", "alloy"),
-                    "ja": ("Japanese", "japoński", "alloy"),
-                    "ko": ("Korean", "koreański", "alloy"),
-                    "zh": ("Chinese", "chiński uproszczony", "alloy"),
-                    # Dodaj inne języki obsługiwane przez TTS-1 jeśli pojawią się w przyszłości
-                }
-
-                language_display = [f"{v[0]} ({k})" for k, v in tts_languages.items()]
-
-                if note_options:
-                    selected_note = st.radio(
-                        "Wersja notatki:",
-                        note_options,
-                        key="translation_note_select_any"
-                    )
+    # Wyświetl poprawioną wersję, jeśli istnieje
+    note_text = ss.get("note_text", "")
+    if "note_text_corrected" in ss:
+        persistent_text_area(
+            "**Druga wersja notatki:** Poprawiona notatka (możesz edytować):",
+            "note_text_corrected"
+        )
 
-                    # Pobierz wybrany tekst
-                    if selected_note == "Pierwsza wersja notatki":
-                        text_to_translate = st.session_state["note_text"]
-                    else:
-                        text_to_translate = st.session_state["note_text_corrected"]
-
-                    # Wybór języka docelowego
-                    selected_lang_display = st.selectbox(
-                        "Wybierz język docelowy do tłumaczenia:",
-                        language_display,
-                        key="target_language_select"
-                    )
-                    # Wyciągnij kod języka i nazwę do promptu
-                    selected_lang_code = selected_lang_display.split("(")[-1].replace(")", "").strip()
-                    selected_lang_prompt = tts_languages[selected_lang_code][1]
-
-                    # Przycisk tłumaczenia
-                    if st.button("Przetłumacz na wybrany język"):
-                        openai_client = get_openai_client()
-                        response = openai_client.chat.completions.create(
-                            model="gpt-4o",
-                            messages=[
-                                {"role": "system", "content": f"Jesteś tłumaczem. Przetłumacz poniższy tekst na {selected_lang_prompt}, zachowując sens i styl oryginału."},
-                                {"role": "user", "content": text_to_translate},
-                            ],
-                            max_tokens=5000,
-                        )
-                        st.session_state["translated_text_any"] = response.choices[0].message.content
-                        st.session_state["translated_lang_code"] = selected_lang_code
-
-                    # Pole do edycji tłumaczenia
-                    if "translated_text_any" in st.session_state:
-                        st.session_state["translated_text_any"] = st.text_area(
-                            f"Tłumaczenie na {tts_languages.get(st.session_state.get('translated_lang_code', 'en'), ('Wybrany język',))[0]} (możesz edytować):",
-                            value=st.session_state["translated_text_any"],
-                            key="translated_text_any_area"
-                        )
-
-                        # Wybór głosu do syntezy mowy
-                        voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                        selected_voice_any = st.selectbox(
-                            "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                            options=voice_options,
-                            key="tts_voice_select_any"
-                        )
-
-                        # Przycisk do generowania audio z tłumaczenia
-                        if st.button("Wygeneruj audio z tłumaczenia na wybrany język"):
-                            openai_client = get_openai_client()
-                            tts_response = openai_client.audio.speech.create(
-                                model="tts-1",
-                                voice=selected_voice_any,
-                                input=st.session_state["translated_text_any"],
-                                response_format="mp3",
-                                speed=1.0,
-                            )
-                            st.session_state["tts_any_audio"] = tts_response.content
-
-                        # Odtwarzacz audio, jeśli audio zostało wygenerowane
-                        if "tts_any_audio" in st.session_state:
-                            st.audio(st.session_state["tts_any_audio"], format="audio/mp3")
-                else:
-                    st.info("Brak notatek do tłumaczenia. Dodaj lub popraw notatkę w zakładce 'Dodaj notatkę'.")
-                
-        with search_tab:
-            
-            query = st.text_input("Wyszukaj notatkę", key="search_query")
-            
-            # Utrzymanie wyników wyszukiwania w session_state
-            if st.button("Szukaj", key="search_btn"):
-                st.session_state["search_results"] = list_notes_from_db(query)
-            
-            notes = st.session_state.get("search_results", [])
-            
-            if notes:
-                st.subheader("Wyniki wyszukiwania:")
-
-                # Przygotowanie etykiet do wyboru notatki do dalszych akcji (edycja/tłumaczenie)
-                note_labels = []
-                for note in notes:
-                    # Wyświetl pełną notatkę i pełny score
-                    with st.container(border=True):
+    # --- Zapis notatki ---
+    col1, col2 = st.columns(2)
+    with col1:
+        if note_text and st.button("Zapisz pierwszą wersję notatki"):
+            add_note_to_db(note_text=note_text)
+            st.toast("Pierwsza wersja notatki zapisana", icon="✅")
+    with col2:
+        if ss.get("note_text_corrected"):
+            if st.button("Zapisz drugą wersję notatki poprawioną przez GPT-4o"):
+                add_note_to_db(note_text=ss["note_text_corrected"])
+                st.toast("Druga wersja notatki zapisana", icon="✅")
+                # Wyczyść poprawioną notatkę po zapisie (opcjonalnie)
+                # del ss["note_text_corrected"]
+
+    # Tworzenie czterech zakładek
+    render_translation_tabs()
+
+def delete_search_result(note_id):
+    """Callback przycisku usuwania: usuwa notatkę i czyści wyniki wyszukiwania.
+
+    Callback działa przed przebiegiem wywołanym kliknięciem, więc fragment od razu rysuje odświeżoną listę - bez st.rerun() całej strony.
+    """
+    delete_note_from_db(note_id)
+    st.toast("Notatka została usunięta!", icon="🗑️")
+    ss.pop("search_results", None)
+    ss.pop("search_results_labels", None)
+    # Usunięta notatka nie może zostać uznana za nadal wybraną po kolejnym wyszukiwaniu
+    if ss.get("last_selected_note_id") == note_id:
+        ss.pop("last_selected_note_id")
+
+@st.fragment
+def render_search_tab(key_suffix="", result_columns=(7, 1)):
+    """Zakładka "Wyszukaj notatkę": wyszukiwanie, usuwanie, edycja i tłumaczenia znalezionej notatki.
+
+    key_suffix rozróżnia klucze widżetów w układzie z czatem ("") i bez czatu ("_no_chat").
+    """
+    query = st.text_input("Wyszukaj notatkę", key=f"search_query{key_suffix}")
+
+    # Utrzymanie wyników wyszukiwania w session_state
+    if st.button("Szukaj", key=f"search_btn{key_suffix}"):
+        ss["search_results"] = list_notes_from_db(query)
+        ss.pop("search_results_labels", None)
+        # Nowe wyniki oglądamy od pierwszej strony
+        ss.pop(f"search_results_page{key_suffix}", None)
+        ss.pop(f"search_results_table{key_suffix}", None)
+
+    notes = ss.get("search_results", [])
+
+    if notes:
+        st.subheader("Wyniki wyszukiwania:")
+
+        # Etykiety notatek na liście do usuwania - liczone raz na wyniki wyszukiwania
+        if "search_results_labels" not in ss:
+            ss["search_results_labels"] = [search_result_label(note) for note in notes]
+        note_labels = ss["search_results_labels"]
+
+        # Wszystkie wyniki w jednej tabeli (jeden element strony zamiast kontenera na notatkę); zaznaczony wiersz wybiera notatkę
+        show_scores = notes[0]["score"] is not None
+        results_table = st.dataframe(
+            {
+                "Notatka": [note["text"] for note in notes],
+                **({"Score": [note["score"] for note in notes]} if show_scores else {}),
+            },
+            use_container_width=True,
+            column_config={"Notatka": st.column_config.TextColumn(width="large")},
+            on_select="rerun",
+            selection_mode="single-row",
+            key=f"search_results_table{key_suffix}",
+        )
+        st.caption("**Zaznacz wiersz tabeli, aby wybrać notatkę do dalszych akcji** znajdujących się na dole (edycja, tłumaczenie itp.) - domyślnie pierwsza.")
+        selected_rows = results_table.selection.rows
+        selected_note_idx = selected_rows[0] if selected_rows else 0
+
+        st.markdown("---")
+        st.subheader("Znalezione notatki z opcją usunięcia z bazy danych:")
+        # Lista z przyciskami usuwania jest stronicowana - pełna treść notatki w zwiniętym expanderze
+        page_count = (len(notes) + SEARCH_RESULTS_PAGE_SIZE - 1) // SEARCH_RESULTS_PAGE_SIZE
+        page = 1
+        if page_count > 1:
+            page = st.number_input(
+                f"Strona wyników (z {page_count}):",
+                min_value=1,
+                max_value=page_count,
+                key=f"search_results_page{key_suffix}"
+            )
+        page_start = (page - 1) * SEARCH_RESULTS_PAGE_SIZE
+        page_notes = notes[page_start:page_start + SEARCH_RESULTS_PAGE_SIZE]
+
+        # Wyświetlanie każdej notatki z przyciskiem do usunięcia
+        for note, label in zip(page_notes, note_labels[page_start:]):
+            with st.container(border=True):
+                col1, col2 = st.columns(result_columns)
+                with col1:
+                    with st.expander(label):
                         st.markdown(note["text"])
-                        if note["score"] is not None:
-                            st.markdown(f':violet[score: {note["score"]}]')
-                    text_short = note["text"][:60].replace("\n", " ") + ("..." if len(note["text"]) > 60 else "")
-                    score = f" (score: {note['score']})" if note["score"] is not None else ""
-                    note_labels.append(text_short + score)
-
-                # Wybór notatki do edycji/tłumaczenia
-                selected_note_idx = st.radio(
-                    "**Wybierz notatkę do dalszych akcji** znajdujących się na dole (edycja, tłumaczenie itp.):",
-                    options=range(len(notes)),
-                    format_func=lambda i: note_labels[i],
-                    key="search_selected_note_idx"
-                )
-
-                st.markdown("---")
-                st.subheader("Znalezione notatki z opcją usunięcia z bazy danych:")
-                # Wyświetlanie każdej notatki z przyciskiem do usunięcia
-                for idx, note in enumerate(notes):
-                    with st.container(border=True):
-                        col1, col2 = st.columns([7, 1])
-                        with col1:
-                            st.markdown(note["text"])
-                            if note["score"] is not None:
-                                st.markdown(f':violet[score: {note["score"]}]')
-                        with col2:
-                            # Przycisk usuwania dla każdej notatki
-                            if st.button("🗑️ Usuń notatkę", key=f"delete_{note['id']}"):
-                                delete_note_from_db(note['id'])
-                                st.toast(f"Notatka została usunięta!", icon="🗑️")
-                                # Wyczyszczenie wyników, aby odświeżyć listę
-                                if "search_results" in st.session_state:
-                                    del st.session_state["search_results"]
-                                # Przerwanie i ponowne uruchomienie skryptu, aby zobaczyć zmiany
-                                st.rerun()
-                
-                st.markdown("---")
-
-                # Dalsze akcje na wybranej notatce (z `st.radio`)
-                if selected_note_idx is not None and len(notes) > selected_note_idx:
-                    selected_note_data = notes[selected_note_idx]
-                    
-                    if st.session_state.get("last_selected_note_id") != selected_note_data["id"]:
-                        st.session_state["search_note_text"] = selected_note_data["text"]
-                        st.session_state["search_note_text_corrected"] = ""
-                        st.session_state["last_selected_note_id"] = selected_note_data["id"]
-
-                    st.subheader("Akcje dla wybranej notatki:")
-                    st.session_state["search_note_text"] = st.text_area(
-                        "**Pierwsza wersja wyszukanej notatki:** Edytuj notatkę:",
-                        value=st.session_state.get("search_note_text", ""),
-                        key="search_note_text_area"
+                    if note["score"] is not None:
+                        st.markdown(f':violet[score: {note["score"]}]')
+                with col2:
+                    # Przycisk usuwania dla każdej notatki
+                    st.button(
+                        "🗑️ Usuń notatkę",
+                        key=f"delete_{note['id']}{key_suffix}",
+                        on_click=delete_search_result,
+                        args=(note["id"],),
                     )
 
-                # --- Poprawa przez GPT-4o ---
-                if st.button("Popraw notatkę przez ChatGPT-4o", key="search_correct_btn"):
-                    openai_client = get_openai_client()
-                    response = openai_client.chat.completions.create(
-                        model="gpt-4o",
-                        messages=[
-                            {"role": "system", "content": "Jesteś pomocnym asystentem, który wykrywa język przetwarzanego tekstu, a następnie koncentruje się jedynie na poprawie ewentualnych błędów w tym tekście, w tym samym języku: np. jeśli wykryjesz tekst napisany po polsku, popraw zgodnie z zasadami języka polskiego; jeśli wykryjesz tekst napisany po angielsku, popraw zgodnie z zasadami języka angielskiego. Poprawiaj tekst pod względem gramatycznym, stylistycznym, składniowym i ortograficznym. Popraw tylko błędy, nie zmieniaj sensu wypowiedzi."},
-                            {"role": "user", "content": st.session_state["search_note_text"]},
-                        ],
-                        max_tokens=5000,
-                    )
-                    st.session_state["search_note_text_corrected"] = response.choices[0].message.content
-
-                # --- Wyświetl poprawioną wersję, jeśli istnieje ---
-                note_to_translate = st.session_state["search_note_text"]
-                if st.session_state.get("search_note_text_corrected"):
-                    st.session_state["search_note_text_corrected"] = st.text_area(
-                        "**Druga wersja wyszukanej notatki:** Poprawiona notatka (możesz edytować):",
-                        value=st.session_state["search_note_text_corrected"],
-                        key="search_note_text_corrected_area"
-                    )
-                    note_to_translate = st.session_state["search_note_text_corrected"]
-
-                st.markdown("---")
-                st.subheader("Akcje dla wybranej notatki:")
-
-                # --- Zakładki jak w add_tab, ale operujące na note_to_translate ---
-                tab1s, tab2s, tab3s, tab4s = st.tabs([
-                    "🇬🇧 Tłumaczenie na British English", 
-                    "🇺🇸 Tłumaczenie na American English", 
-                    "🇵🇱 Tłumaczenie na Polski", 
-                    "🌍 Tłumaczenie na wybrany język"
-                ])
-
-                with tab1s:
-                    st.header("🇬🇧 Tłumaczenie na British English")
-                    st.write("Wybierz wersję wyszukanej notatki do tłumaczenia:")
-
-                    # Wybór wersji notatki
-                    note_options = []
-                    if st.session_state.get("search_note_text"):
-                        note_options.append("Pierwsza wersja wyszukanej notatki")
-                    if st.session_state.get("search_note_text_corrected"):
-                        note_options.append("Druga wersja wyszukanej notatki (poprawiona przez GPT-4o)")
-
-                    if note_options:
-                        selected_note = st.radio(
-                            "Wersja notatki:",
-                            note_options,
-                            key="search_translation_note_select"
-                        )
-
-                        # Pobierz wybrany tekst
-                        if selected_note == "Pierwsza wersja wyszukanej notatki":
-                            text_to_translate = st.session_state["search_note_text"]
-                        else:
-                            text_to_translate = st.session_state["search_note_text_corrected"]
-
-                        # Przycisk tłumaczenia
-                        if st.button("Przetłumacz na brytyjski angielski", key="search_translate_br"):
-                            openai_client = get_openai_client()
-                            response = openai_client.chat.completions.create(
-                                model="gpt-4o",
-                                messages=[
-                                    {"role": "system", "content": "Jesteś tłumaczem. Przetłumacz poniższy tekst na brytyjski angielski, zachowując sens i styl oryginału."},
-                                    {"role": "user", "content": text_to_translate},
-                                ],
-                                max_tokens=5000,
-                            )
-                            st.session_state["search_translated_text_br"] = response.choices[0].message.content
-
-                        # Pole do edycji tłumaczenia
-                        if "search_translated_text_br" in st.session_state:
-                            st.session_state["search_translated_text_br"] = st.text_area(
-                                "Tłumaczenie na BR ENG (możesz edytować):",
-                                value=st.session_state["search_translated_text_br"],
-                                key="search_translated_text_br_area"
-                            )
-
-                            # Wybór głosu do syntezy mowy
-                            voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                            selected_voice = st.selectbox(
-                                "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                                options=voice_options,
-                                key="search_tts_voice_select_br"
-                            )
-
-                            # Przycisk do generowania audio z tłumaczenia
-                            if st.button("Wygeneruj audio z tłumaczenia na British English", key="search_tts_br"):
-                                openai_client = get_openai_client()
-                                tts_response = openai_client.audio.speech.create(
-                                    model="tts-1",
-                                    voice=selected_voice,
-                                    input=st.session_state["search_translated_text_br"]
-                                )
-                                st.session_state["search_tts_br_audio"] = tts_response.content
-
-                            # Odtwarzacz audio, jeśli audio zostało wygenerowane
-                            if "search_tts_br_audio" in st.session_state:
-                                st.audio(st.session_state["search_tts_br_audio"], format="audio/mp3")
-                    else:
-                        st.info("Brak wersji wyszukanej notatki do tłumaczenia. Edytuj lub popraw notatkę w zakładce 'Dodaj notatkę'.")
-
-                with tab2s:
-                    st.header("🇺🇸 Tłumaczenie na American English")
-                    st.write("Wybierz wersję wyszukanej notatki do tłumaczenia:")
-
-                    note_options = []
-                    if st.session_state.get("search_note_text"):
-                        note_options.append("Pierwsza wersja wyszukanej notatki")
-                    if st.session_state.get("search_note_text_corrected"):
-                        note_options.append("Druga wersja wyszukanej notatki (poprawiona przez GPT-4o)")
-
-                    if note_options:
-                        selected_note = st.radio(
-                            "Wersja notatki:",
-                            note_options,
-                            key="search_translation_note_select_us"
-                        )
-
-                        if selected_note == "Pierwsza wersja wyszukanej notatki":
-                            text_to_translate = st.session_state["search_note_text"]
-                        else:
-                            text_to_translate = st.session_state["search_note_text_corrected"]
-
-                        if st.button("Przetłumacz na amerykański angielski", key="search_translate_us"):
-                            openai_client = get_openai_client()
-                            response = openai_client.chat.completions.create(
-                                model="gpt-4o",
-                                messages=[
-                                    {"role": "system", "content": "Jesteś tłumaczem. Przetłumacz poniższy tekst na amerykański angielski, zachowując sens i styl oryginału."},
-                                    {"role": "user", "content": text_to_translate},
-                                ],
-                                max_tokens=5000,
-                            )
-                            st.session_state["search_translated_text_us"] = response.choices[0].message.content
-
-                        if "search_translated_text_us" in st.session_state:
-                            st.session_state["search_translated_text_us"] = st.text_area(
-                                "Tłumaczenie na US ENG (możesz edytować):",
-                                value=st.session_state["search_translated_text_us"],
-                                key="search_translated_text_us_area"
-                            )
-
-                            voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                            selected_voice_us = st.selectbox(
-                                "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                                options=voice_options,
-                                key="search_tts_voice_select_us"
-                            )
-
-                            if st.button("Wygeneruj audio z tłumaczenia na American English", key="search_tts_us"):
-                                openai_client = get_openai_client()
-                                tts_response = openai_client.audio.speech.create(
-                                    model="tts-1",
-                                    voice=selected_voice_us,
-                                    input=st.session_state["search_translated_text_us"]
-                                )
-                                st.session_state["search_tts_us_audio"] = tts_response.content
-
-                            if "search_tts_us_audio" in st.session_state:
-                                st.audio(st.session_state["search_tts_us_audio"], format="audio/mp3")
-                    else:
-                        st.info("Brak wersji wyszukanej notatki do tłumaczenia. Edytuj lub popraw notatkę powyżej.")
-
-                with tab3s:
-                    st.header("🇵🇱 Tłumaczenie na Polski")
-                    st.write("Wybierz wersję wyszukanej notatki do tłumaczenia:")
-
-                    note_options = []
-                    if st.session_state.get("search_note_text"):
-                        note_options.append("Pierwsza wersja wyszukanej notatki")
-                    if st.session_state.get("search_note_text_corrected"):
-                        note_options.append("Druga wersja wyszukanej notatki (poprawiona przez GPT-4o)")
-
-                    if note_options:
-                        selected_note = st.radio(
-                            "Wersja notatki:",
-                            note_options,
-                            key="search_translation_note_select_pl"
-                        )
-
-                        if selected_note == "Pierwsza wersja wyszukanej notatki":
-                            text_to_translate = st.session_state["search_note_text"]
-                        else:
-                            text_to_translate = st.session_state["search_note_text_corrected"]
-
-                        if st.button("Przetłumacz na polski", key="search_translate_pl"):
-                            openai_client = get_openai_client()
-                            response = openai_client.chat.completions.create(
-                                model="gpt-4o",
-                                messages=[
-                                    {"role": "system", "content": "Jesteś tłumaczem. Przetłumacz poniższy tekst na język polski, zachowując sens i styl oryginału."},
-                                    {"role": "user", "content": text_to_translate},
-                                ],
-                                max_tokens=5000,
-                            )
-                            st.session_state["search_translated_text_pl"] = response.choices[0].message.content
-
-                        if "search_translated_text_pl" in st.session_state:
-                            st.session_state["search_translated_text_pl"] = st.text_area(
-                                "Tłumaczenie na polski (możesz edytować):",
-                                value=st.session_state["search_translated_text_pl"],
-                                key="search_translated_text_pl_area"
-                            )
-
-                            voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                            selected_voice_pl = st.selectbox(
-                                "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                                options=voice_options,
-                                key="search_tts_voice_select_pl"
-                            )
-
-                            if st.button("Wygeneruj audio z tłumaczenia na polski", key="search_tts_pl"):
-                                openai_client = get_openai_client()
-                                tts_response = openai_client.audio.speech.create(
-                                    model="tts-1",
-                                    voice=selected_voice_pl,
-                                    input=st.session_state["search_translated_text_pl"]
-                                )
-                                st.session_state["search_tts_pl_audio"] = tts_response.content
-
-                            if "search_tts_pl_audio" in st.session_state:
-                                st.audio(st.session_state["search_tts_pl_audio"], format="audio/mp3")
-                    else:
-                        st.info("Brak wersji wyszukanej notatki do tłumaczenia. Edytuj lub popraw notatkę powyżej.")
-
-                with tab4s:
-                    st.header("🌍 Tłumaczenie na wybrany język")
-                    st.write("Wybierz wersję wyszukanej notatki oraz język docelowy do tłumaczenia:")
-
-                    note_options = []
-                    if st.session_state.get("search_note_text"):
-                        note_options.append("Pierwsza wersja wyszukanej notatki")
-                    if st.session_state.get("search_note_text_corrected"):
-                        note_options.append("Druga wersja wyszukanej notatki (poprawiona przez GPT-4o)")
-
-                    # Lista języków obsługiwanych przez TTS-1 (OpenAI, stan na czerwiec 2024)
-                    tts_languages = {
-                        "en": ("English", "angielski", "alloy"),
-                        "de": ("German", "niemiecki", "echo"),
-                        "es": ("Spanish", "hiszpański", "fable"),
-                        "fr": ("French", "francuski", "nova"),
-                        "it": ("Italian", "włoski", "onyx"),
-                        "pt": ("Portuguese", "portugalski", "shimmer"),
-                        "pl": ("Polish", "polski", "alloy"),
-                        "tr": ("Turkish", "turecki", "alloy"),
-                        "hi": ("Hindi", "hindi", "alloy"),
-                        "ja": ("Japanese", "japoński", "alloy"),
-                        "ko": ("Korean", "koreański", "alloy"),
-                        "zh": ("Chinese", "chiński uproszczony", "alloy"),
-                    }
-                    language_display = [f"{v[0]} ({k})" for k, v in tts_languages.items()]
-
-                    if note_options:
-                        selected_note = st.radio(
-                            "Wersja notatki:",
-                            note_options,
-                            key="search_translation_note_select_any"
-                        )
-
-                        if selected_note == "Pierwsza wersja wyszukanej notatki":
-                            text_to_translate = st.session_state["search_note_text"]
-                        else:
-                            text_to_translate = st.session_state["search_note_text_corrected"]
-
-                        selected_lang_display = st.selectbox(
-                            "Wybierz język docelowy do tłumaczenia:",
-                            language_display,
-                            key="search_target_language_select"
-                        )
-                        selected_lang_code = selected_lang_display.split("(")[-1].replace(")", "").strip()
-                        selected_lang_prompt = tts_languages[selected_lang_code][1]
-
-                        if st.button("Przetłumacz na wybrany język", key="search_translate_any"):
-                            openai_client = get_openai_client()
-                            response = openai_client.chat.completions.create(
-                                model="gpt-4o",
-                                messages=[
-                                    {"role": "system", "content": f"Jesteś tłumaczem. Przetłumacz poniższy tekst na {selected_lang_prompt}, zachowując sens i styl oryginału."},
-                                    {"role": "user", "content": text_to_translate},
-                                ],
-                                max_tokens=5000,
-                            )
-                            st.session_state["search_translated_text_any"] = response.choices[0].message.content
-                            st.session_state["search_translated_lang_code"] = selected_lang_code
-
-                        if "search_translated_text_any" in st.session_state:
-                            st.session_state["search_translated_text_any"] = st.text_area(
-                                f"Tłumaczenie na {tts_languages.get(st.session_state.get('search_translated_lang_code', 'en'), ('Wybrany język',))[0]} (możesz edytować):",
-                                value=st.session_state["search_translated_text_any"],
-                                key="search_translated_text_any_area"
-                            )
-
-                            voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                            selected_voice_any = st.selectbox(
-                                "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                                options=voice_options,
-                                key="search_tts_voice_select_any"
-                            )
-
-                            if st.button("Wygeneruj audio z tłumaczenia na wybrany język", key="search_tts_any"):
-                                openai_client = get_openai_client()
-                                tts_response = openai_client.audio.speech.create(
-                                    model="tts-1",
-                                    voice=selected_voice_any,
-                                    input=st.session_state["search_translated_text_any"],
-                                    response_format="mp3",
-                                    speed=1.0,
-                                )
-                                st.session_state["search_tts_any_audio"] = tts_response.content
-
-                            if "search_tts_any_audio" in st.session_state:
-                                st.audio(st.session_state["search_tts_any_audio"], format="audio/mp3")
-                    else:
-                        st.info("Brak wersji wyszukanej notatki do tłumaczenia. Edytuj lub popraw notatkę powyżej.")
-    with col_chat:
-        st.subheader("💬 Rozmowa z ChatGPT-4o o wybranym tekście")
-        text_key = text_sources[st.session_state.chat_text_source]
-        text_for_chat = st.session_state.get(text_key, "")
+        st.markdown("---")
 
-        # Jeśli historia jest pusta, ustaw pierwszy prompt z kontekstem
-        if not st.session_state.chat_history and text_for_chat:
-            st.session_state.chat_history.append({
-                "role": "system",
-                "content": f"Jesteś ekspertem językowym. Odpowiadasz na pytania dotyczące wybranego tekstu:\n\n{text_for_chat}"
-            })
-
-        # Zapamiętaj poprzednie źródło tekstu
-        if "prev_chat_text_source" not in st.session_state:
-            st.session_state["prev_chat_text_source"] = st.session_state.chat_text_source
-
-        # Jeśli zmieniono źródło tekstu, zresetuj historię i ustaw nowy systemowy prompt
-        if st.session_state["prev_chat_text_source"] != st.session_state.chat_text_source:
-            st.session_state.chat_history = []
-            text_key = text_sources[st.session_state.chat_text_source]
-            text_for_chat = st.session_state.get(text_key, "")
-            if text_for_chat:
-                st.session_state.chat_history.append({
-                    "role": "system",
-                    "content": f"Jesteś ekspertem językowym. Odpowiadasz na pytania dotyczące wybranego tekstu:\n\n{text_for_chat}"
-                })
-            st.session_state["prev_chat_text_source"] = st.session_state.chat_text_source
-
-        st.markdown("**Tekst do rozmowy:**")
-        st.write(text_for_chat)
-
-        if st.session_state.get("clear_chat_input"):
-            st.session_state["chat_user_input"] = ""
-            st.session_state["clear_chat_input"] = False
-
-        user_input = st.text_input(
-            "Zadaj pytanie dotyczące powyższego tekstu lub poproś o wyjaśnienie, np. 1. Czy tekst jest poprawny pod względem gramatycznym i stylistycznym? Wykonaj analizę. 2. Przekształć tekst na bardziej formalny styl - zaproponuj dwie wersje",
-            value=st.session_state.get("chat_user_input", ""),
-            key="chat_user_input",
-            # placeholder="Czy tekst jest poprawny pod względem gramatycznym i stylistycznym? Wykonaj analizę"
-        )
+        # Dalsze akcje na wybranej notatce (z tabeli wyników)
+        if selected_note_idx is not None and len(notes) > selected_note_idx:
+            selected_note_data = notes[selected_note_idx]
 
-        if user_input:
-            # --- AKTUALIZUJ SYSTEMOWY PROMPT Z NAJNOWSZYM TEKSTEM ---
-            text_key = text_sources[st.session_state.chat_text_source]
-            text_for_chat = st.session_state.get(text_key, "")
-            # Usuń stary systemowy prompt (jeśli istnieje)
-            if st.session_state.chat_history and st.session_state.chat_history[0]["role"] == "system":
-                st.session_state.chat_history[0] = {
-                    "role": "system",
-                    "content": f"Jesteś ekspertem językowym. Odpowiadasz na pytania dotyczące wybranego tekstu:\n\n{text_for_chat}"
-                }
-            else:
-                st.session_state.chat_history.insert(0, {
-                    "role": "system",
-                    "content": f"Jesteś ekspertem językowym. Odpowiadasz na pytania dotyczące wybranego tekstu:\n\n{text_for_chat}"
-                })
+            if ss.get("last_selected_note_id") != selected_note_data["id"]:
+                ss["search_note_text"] = selected_note_data["text"]
+                ss["search_note_text_corrected"] = ""
+                ss["last_selected_note_id"] = selected_note_data["id"]
 
-            st.session_state.chat_history.append({"role": "user", "content": user_input})
-            try:
-                openai_client = get_openai_client()
-                response = openai_client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=st.session_state.chat_history,
-                    max_tokens=5000,
-                )
-                answer = response.choices[0].message.content
-                st.session_state.chat_history.append({"role": "assistant", "content": answer})
-            except Exception as e:
-                answer = f"Błąd komunikacji z OpenAI: {e}"
-                st.session_state.chat_history.append({"role": "assistant", "content": answer})
-
-            st.session_state["clear_chat_input"] = True
-
-        # Wyświetl historię rozmowy
-        # for msg in reversed(st.session_state.chat_history):
-        for msg in st.session_state.chat_history:    
-            if msg["role"] == "user":
-                st.markdown(f"**Ty:** {msg['content']}")
-            elif msg["role"] == "assistant":
-                st.markdown(f"**ChatGPT-4o:** {msg['content']}")
-            elif msg["role"] == "system":
-                st.markdown(f"**Kontekst rozmowy:** {msg['content']}")
-
-        if st.button("Wyczyść historię rozmowy"):
-            st.session_state.chat_history = []
-            st.session_state["clear_chat_input"] = True
-            st.rerun()
+            st.subheader("Akcje dla wybranej notatki:")
+            persistent_text_area(
+                "**Pierwsza wersja wyszukanej notatki:** Edytuj notatkę:",
+                "search_note_text"
+            )
 
-        # if st.button("Wyczyść historię rozmowy"):
-        #     st.session_state.chat_history = []
-else:
-        assure_db_collection_exists()
-        add_tab, search_tab = st.tabs(["Dodaj notatkę", "Wyszukaj notatkę"])
+        # --- Poprawa przez GPT-4o ---
+        if st.button("Popraw notatkę przez ChatGPT-4o", key=f"search_correct_btn{key_suffix}"):
+            correct_note_in_state("search_note_text", "search_note_text_corrected")
 
-        with add_tab:
-            # --- Sekcja nagrywania i transkrypcji ---
-            note_audio = audiorecorder(
-                start_prompt="Nagraj notatkę",
-                stop_prompt="Zatrzymaj nagrywanie",
-            )
-            if note_audio:
-                audio = BytesIO()
-                note_audio.export(audio, format="mp3")
-                st.session_state["note_audio_bytes"] = audio.getvalue()
-                current_md5 = md5(st.session_state["note_audio_bytes"]).hexdigest()
-                if st.session_state["note_audio_bytes_md5"] != current_md5:
-                    st.session_state["note_audio_bytes_md5"] = current_md5
-
-                st.audio(st.session_state["note_audio_bytes"], format="audio/mp3")
-
-                if st.button("Transkrybuj audio"):
-                    transcribed = transcribe_audio(st.session_state["note_audio_bytes"])
-                    # Ustaw transkrypcję jako tekst do edycji
-                    st.session_state["note_text"] = transcribed
-                    
-            # --- Pole do edycji notatki (zawsze widoczne) ---
-            st.session_state["note_text"] = st.text_area(
-                "**Pierwsza wersja notatki:** Edytuj notatkę (możesz wpisać, wkleić lub użyć transkrypcji audio, a następnie dalej edytować):",
-                value=st.session_state.get("note_text", ""),
-                key="note_text_area"
+        # --- Wyświetl poprawioną wersję, jeśli istnieje ---
+        if ss.get("search_note_text_corrected"):
+            persistent_text_area(
+                "**Druga wersja wyszukanej notatki:** Poprawiona notatka (możesz edytować):",
+                "search_note_text_corrected"
             )
 
-            # --- Sekcja poprawy przez GPT-4o ---
-            if st.button("Popraw notatkę przez ChatGPT-4o"):
-                openai_client = get_openai_client()
-                response = openai_client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {"role": "system", "content": "Jesteś pomocnym asystentem, który wykrywa język przetwarzanego tekstu, a następnie koncentruje się jedynie na poprawie ewentualnych błędów w tym tekście, w tym samym języku: np. jeśli wykryjesz tekst napisany po polsku, popraw zgodnie z zasadami języka polskiego; jeśli wykryjesz tekst napisany po angielsku, popraw zgodnie z zasadami języka angielskiego. Poprawiaj tekst pod względem gramatycznym, stylistycznym, składniowym i ortograficznym. Popraw tylko błędy, nie zmieniaj sensu wypowiedzi."},
-                        {"role": "user", "content": st.session_state["note_text"]},
-                    ],
-                    max_tokens=5000,
-                )
-                st.session_state["note_text_corrected"] = response.choices[0].message.content
-
-            # Wyświetl poprawioną wersję, jeśli istnieje
-            note_to_save = st.session_state.get("note_text", "")
-            if "note_text_corrected" in st.session_state:
-                st.session_state["note_text_corrected"] = st.text_area(
-                    "**Druga wersja notatki:** Poprawiona notatka (możesz edytować):",
-                    value=st.session_state["note_text_corrected"],
-                    key="note_text_corrected_area"
-                )
-                note_to_save = st.session_state["note_text_corrected"]
-
-            # --- Zapis notatki ---
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.session_state.get("note_text", "") and st.button("Zapisz pierwszą wersję notatki"):
-                    add_note_to_db(note_text=st.session_state["note_text"])
-                    st.toast("Pierwsza wersja notatki zapisana", icon="✅")
-            with col2:
-                if "note_text_corrected" in st.session_state and st.session_state["note_text_corrected"]:
-                    if st.button("Zapisz drugą wersję notatki poprawioną przez GPT-4o"):
-                        add_note_to_db(note_text=st.session_state["note_text_corrected"])
-                        st.toast("Druga wersja notatki zapisana", icon="✅")
-                        # Wyczyść poprawioną notatkę po zapisie (opcjonalnie)
-                        # del st.session_state["note_text_corrected"]
-
-            # Tworzenie czterech zakładek
-            tab1, tab2, tab3, tab4 = st.tabs([
-                "🇬🇧 Tłumaczenie na British English", 
-                "🇺🇸 Tłumaczenie na American English", 
-                "🇵🇱 Tłumaczenie na Polski", 
-                "🌍 Tłumaczenie na wybrany język"
-            ])
-
-            with tab1:
-                st.header("🇬🇧 Tłumaczenie na British English")
-                st.write("Wybierz wersję notatki do tłumaczenia:")
-
-                # Wybór wersji notatki
-                note_options = []
-                if st.session_state.get("note_text"):
-                    note_options.append("Pierwsza wersja notatki")
-                if st.session_state.get("note_text_corrected"):
-                    note_options.append("Druga wersja notatki (poprawiona przez GPT-4o)")
-
-                if note_options:
-                    selected_note = st.radio(
-                        "Wersja notatki:",
-                        note_options,
-                        key="translation_note_select"
-                    )
+        st.markdown("---")
+        st.subheader("Akcje dla wybranej notatki:")
 
-                    # Pobierz wybrany tekst
-                    if selected_note == "Pierwsza wersja notatki":
-                        text_to_translate = st.session_state["note_text"]
-                    else:
-                        text_to_translate = st.session_state["note_text_corrected"]
-
-                    # Przycisk tłumaczenia
-                    if st.button("Przetłumacz na brytyjski angielski"):
-                        openai_client = get_openai_client()
-                        response = openai_client.chat.completions.create(
-                            model="gpt-4o",
-                            messages=[
-                                {"role": "system", "content": "Jesteś tłumaczem. Przetłumacz poniższy tekst na brytyjski angielski, zachowując sens i styl oryginału."},
-                                {"role": "user", "content": text_to_translate},
-                            ],
-                            max_tokens=5000,
-                        )
-                        st.session_state["translated_text_br"] = response.choices[0].message.content
-
-                    # Pole do edycji tłumaczenia
-                    if "translated_text_br" in st.session_state:
-                        st.session_state["translated_text_br"] = st.text_area(
-                            "Tłumaczenie na BR ENG (możesz edytować):",
-                            value=st.session_state["translated_text_br"],
-                            key="translated_text_br_area"
-                        )
-
-                        # Wybór głosu do syntezy mowy
-                        voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                        selected_voice = st.selectbox(
-                            "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                            options=voice_options,
-                            key="tts_voice_select"
-                        )
-
-                        # Przycisk do generowania audio z tłumaczenia
-                        if st.button("Wygeneruj audio z tłumaczenia na British English"):
-                            openai_client = get_openai_client()
-                            tts_response = openai_client.audio.speech.create(
-                                model="tts-1",
-                                voice=selected_voice,
-                                input=st.session_state["translated_text_br"]
-                            )
-                            st.session_state["tts_br_audio"] = tts_response.content
-
-                        # Odtwarzacz audio, jeśli audio zostało wygenerowane
-                        if "tts_br_audio" in st.session_state:
-                            st.audio(st.session_state["tts_br_audio"], format="audio/mp3")
-                else:
-                    st.info("Brak notatek do tłumaczenia. Dodaj lub popraw notatkę w zakładce 'Dodaj notatkę'.")
-
-            with tab2:
-                st.header("🇺🇸 Tłumaczenie na American English")
-                st.write("Wybierz wersję notatki do tłumaczenia:")
-
-                note_options = []
-                if st.session_state.get("note_text"):
-                    note_options.append("Pierwsza wersja notatki")
-                if st.session_state.get("note_text_corrected"):
-                    note_options.append("Druga wersja notatki (poprawiona przez GPT-4o)")
-
-                if note_options:
-                    selected_note = st.radio(
-                        "Wersja notatki:",
-                        note_options,
-                        key="translation_note_select_us"
-                    )
+        # --- Zakładki jak w add_tab, ale operujące na wyszukanej notatce ---
+        render_translation_tabs(source_prefix="search_")
 
-                    if selected_note == "Pierwsza wersja notatki":
-                        text_to_translate = st.session_state["note_text"]
-                    else:
-                        text_to_translate = st.session_state["note_text_corrected"]
-
-                    if st.button("Przetłumacz na amerykański angielski"):
-                        openai_client = get_openai_client()
-                        response = openai_client.chat.completions.create(
-                            model="gpt-4o",
-                            messages=[
-                                {"role": "system", "content": "Jesteś tłumaczem. Przetłumacz poniższy tekst na amerykański angielski, zachowując sens i styl oryginału."},
-                                {"role": "user", "content": text_to_translate},
-                            ],
-                            max_tokens=5000,
-                        )
-                        st.session_state["translated_text_us"] = response.choices[0].message.content
-
-                    if "translated_text_us" in st.session_state:
-                        st.session_state["translated_text_us"] = st.text_area(
-                            "Tłumaczenie na US ENG (możesz edytować):",
-                            value=st.session_state["translated_text_us"],
-                            key="translated_text_us_area"
-                        )
-
-                        voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                        selected_voice_us = st.selectbox(
-                            "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                            options=voice_options,
-                            key="tts_voice_select_us"
-                        )
-
-                        if st.button("Wygeneruj audio z tłumaczenia na American English"):
-                            openai_client = get_openai_client()
-                            tts_response = openai_client.audio.speech.create(
-                                model="tts-1",
-                                voice=selected_voice_us,
-                                input=st.session_state["translated_text_us"]
-                            )
-                            st.session_state["tts_us_audio"] = tts_response.content
-
-                        if "tts_us_audio" in st.session_state:
-                            st.audio(st.session_state["tts_us_audio"], format="audio/mp3")
-                else:
-                    st.info("Brak notatek do tłumaczenia. Dodaj lub popraw notatkę w zakładce 'Dodaj notatkę'.")
-
-            with tab3:
-                st.header("🇵🇱 Tłumaczenie na Polski")
-                st.write("Wybierz wersję notatki do tłumaczenia:")
-
-                note_options = []
-                if st.session_state.get("note_text"):
-                    note_options.append("Pierwsza wersja notatki")
-                if st.session_state.get("note_text_corrected"):
-                    note_options.append("Druga wersja notatki (poprawiona przez GPT-4o)")
-
-                if note_options:
-                    selected_note = st.radio(
-                        "Wersja notatki:",
-                        note_options,
-                        key="translation_note_select_pl"
-                    )
+# Sprawdzenie kolekcji raz na sesję zamiast zapytania do Qdranta przy każdej interakcji
+if not ss.get("_db_ready"):
+    assure_db_collection_exists()
+    ss["_db_ready"] = True
 
-                    if selected_note == "Pierwsza wersja notatki":
-                        text_to_translate = st.session_state["note_text"]
-                    else:
-                        text_to_translate = st.session_state["note_text_corrected"]
-
-                    if st.button("Przetłumacz na polski"):
-                        openai_client = get_openai_client()
-                        response = openai_client.chat.completions.create(
-                            model="gpt-4o",
-                            messages=[
-                                {"role": "system", "content": "Jesteś tłumaczem. Przetłumacz poniższy tekst na język polski, zachowując sens i styl oryginału."},
-                                {"role": "user", "content": text_to_translate},
-                            ],
-                            max_tokens=5000,
-                        )
-                        st.session_state["translated_text_pl"] = response.choices[0].message.content
-
-                    if "translated_text_pl" in st.session_state:
-                        st.session_state["translated_text_pl"] = st.text_area(
-                            "Tłumaczenie na polski (możesz edytować):",
-                            value=st.session_state["translated_text_pl"],
-                            key="translated_text_pl_area"
-                        )
-
-                        voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                        selected_voice_pl = st.selectbox(
-                            "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                            options=voice_options,
-                            key="tts_voice_select_pl"
-                        )
-
-                        if st.button("Wygeneruj audio z tłumaczenia na polski"):
-                            openai_client = get_openai_client()
-                            tts_response = openai_client.audio.speech.create(
-                                model="tts-1",
-                                voice=selected_voice_pl,
-                                input=st.session_state["translated_text_pl"]
-                            )
-                            st.session_state["tts_pl_audio"] = tts_response.content
-
-                        if "tts_pl_audio" in st.session_state:
-                            st.audio(st.session_state["tts_pl_audio"], format="audio/mp3")
-                else:
-                    st.info("Brak notatek do tłumaczenia. Dodaj lub popraw notatkę w zakładce 'Dodaj notatkę'.")
-
-
-            with tab4:
-                st.header("🌍 Tłumaczenie na wybrany język")
-                st.write("Wybierz wersję notatki oraz język docelowy do tłumaczenia:")
-
-                # Wersje notatki do wyboru
-                note_options = []
-                if st.session_state.get("note_text"):
-                    note_options.append("Pierwsza wersja notatki")
-                if st.session_state.get("note_text_corrected"):
-                    note_options.append("Druga wersja notatki (poprawiona przez GPT-4o)")
-
-                # Lista języków obsługiwanych przez TTS-1 (OpenAI, stan na czerwiec 2024)
-                # Kod języka: (nazwa wyświetlana, prompt do GPT, voice_hint)
-                tts_languages = {
-                    "en": ("English", "angielski", "alloy"),  # alloy, onyx, echo, fable, nova, shimmer
-                    "de": ("German", "niemiecki", "echo"),
-                    "es": ("Spanish", "hiszpański", "fable"),
-                    "fr": ("French", "francuski", "nova"),
-                    "it": ("Italian", "włoski", "onyx"),
-                    "pt": ("Portuguese", "portugalski", "shimmer"),
-                    "pl": ("Polish", "polski", "alloy"),
-                    "tr": ("Turkish", "turecki", "alloy"),
-                    "hi": ("Hindi", "hindi", "alloy"),
-                    "ja": ("Japanese", "japoński", "alloy"),
-                    "ko": ("Korean", "koreański", "alloy"),
-                    "zh": ("Chinese", "chiński uproszczony", "alloy"),
-                    # Dodaj inne języki obsługiwane przez TTS-1 jeśli pojawią się w przyszłości
-                }
-
-                language_display = [f"{v[0]} ({k})" for k, v in tts_languages.items()]
-
-                if note_options:
-                    selected_note = st.radio(
-                        "Wersja notatki:",
-                        note_options,
-                        key="translation_note_select_any"
-                    )
+st.title("Notatki Audio / Tekst do opracowania")
 
-                    # Pobierz wybrany tekst
-                    if selected_note == "Pierwsza wersja notatki":
-                        text_to_translate = st.session_state["note_text"]
-                    else:
-                        text_to_translate = st.session_state["note_text_corrected"]
-
-                    # Wybór języka docelowego
-                    selected_lang_display = st.selectbox(
-                        "Wybierz język docelowy do tłumaczenia:",
-                        language_display,
-                        key="target_language_select"
-                    )
-                    # Wyciągnij kod języka i nazwę do promptu
-                    selected_lang_code = selected_lang_display.split("(")[-1].replace(")", "").strip()
-                    selected_lang_prompt = tts_languages[selected_lang_code][1]
-
-                    # Przycisk tłumaczenia
-                    if st.button("Przetłumacz na wybrany język"):
-                        openai_client = get_openai_client()
-                        response = openai_client.chat.completions.create(
-                            model="gpt-4o",
-                            messages=[
-                                {"role": "system", "content": f"Jesteś tłumaczem. Przetłumacz poniższy tekst na {selected_lang_prompt}, zachowując sens i styl oryginału."},
-                                {"role": "user", "content": text_to_translate},
-                            ],
-                            max_tokens=5000,
-                        )
-                        st.session_state["translated_text_any"] = response.choices[0].message.content
-                        st.session_state["translated_lang_code"] = selected_lang_code
-
-                    # Pole do edycji tłumaczenia
-                    if "translated_text_any" in st.session_state:
-                        st.session_state["translated_text_any"] = st.text_area(
-                            f"Tłumaczenie na {tts_languages.get(st.session_state.get('translated_lang_code', 'en'), ('Wybrany język',))[0]} (możesz edytować):",
-                            value=st.session_state["translated_text_any"],
-                            key="translated_text_any_area"
-                        )
-
-                        # Wybór głosu do syntezy mowy
-                        voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                        selected_voice_any = st.selectbox(
-                            "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                            options=voice_options,
-                            key="tts_voice_select_any"
-                        )
-
-                        # Przycisk do generowania audio z tłumaczenia
-                        if st.button("Wygeneruj audio z tłumaczenia na wybrany język"):
-                            openai_client = get_openai_client()
-                            tts_response = openai_client.audio.speech.create(
-                                model="tts-1",
-                                voice=selected_voice_any,
-                                input=st.session_state["translated_text_any"],
-                                response_format="mp3",
-                                speed=1.0,
-                            )
-                            st.session_state["tts_any_audio"] = tts_response.content
-
-                        # Odtwarzacz audio, jeśli audio zostało wygenerowane
-                        if "tts_any_audio" in st.session_state:
-                            st.audio(st.session_state["tts_any_audio"], format="audio/mp3")
-                else:
-                    st.info("Brak notatek do tłumaczenia. Dodaj lub popraw notatkę w zakładce 'Dodaj notatkę'.")
-                
+if ss.chat_active:
+    col_main, col_chat = st.columns([1, 1])
+    with col_main:
+        add_tab, search_tab = st.tabs(["Dodaj notatkę", "Wyszukaj notatkę"])
+        with add_tab:
+            render_add_note_tab()
         with search_tab:
-
-            query = st.text_input("Wyszukaj notatkę", key="search_query_no_chat")
-            
-            if st.button("Szukaj", key="search_btn_no_chat"):
-                st.session_state["search_results"] = list_notes_from_db(query)
-        
-            notes = st.session_state.get("search_results", [])
-            
-            if notes:
-                st.subheader("Wyniki wyszukiwania:")
-            
-                note_labels = []
-                for note in notes:
-                    with st.container(border=True):
-                        st.markdown(note["text"])
-                        if note["score"] is not None:
-                            st.markdown(f':violet[score: {note["score"]}]')
-                    text_short = note["text"][:60].replace("\n", " ") + ("..." if len(note["text"]) > 60 else "")
-                    score = f" (score: {note['score']})" if note["score"] is not None else ""
-                    note_labels.append(text_short + score)
-
-                selected_note_idx = st.radio(
-                    "**Wybierz notatkę do dalszych akcji** znajdujących się na dole (edycja, tłumaczenie itp.):",
-                    options=range(len(notes)),
-                    format_func=lambda i: note_labels[i],
-                    key="search_selected_note_idx_no_chat"
-                )                
-
-                st.markdown("---")
-                st.subheader("Znalezione notatki z opcją usunięcia z bazy danych:")
-                for idx, note in enumerate(notes):
-                    with st.container(border=True):
-                        col1, col2 = st.columns([8, 1])
-                        with col1:
-                            st.markdown(note["text"])
-                            if note["score"] is not None:
-                                st.markdown(f':violet[score: {note["score"]}]')
-                        with col2:
-                            if st.button("🗑️ Usuń notatkę", key=f"delete_{note['id']}_no_chat"):
-                                delete_note_from_db(note['id'])
-                                st.toast(f"Notatka została usunięta!", icon="🗑️")
-                                if "search_results" in st.session_state:
-                                    del st.session_state["search_results"]
-                                st.rerun()
-                
-                st.markdown("---")
-
-                if selected_note_idx is not None and len(notes) > selected_note_idx:
-                    selected_note_data = notes[selected_note_idx]
-                    
-                    if st.session_state.get("last_selected_note_id") != selected_note_data["id"]:
-                        st.session_state["search_note_text"] = selected_note_data["text"]
-                        st.session_state["search_note_text_corrected"] = ""
-                        st.session_state["last_selected_note_id"] = selected_note_data["id"]
-
-                    st.subheader("Akcje dla wybranej notatki:")
-                    st.session_state["search_note_text"] = st.text_area(
-                        "**Pierwsza wersja wyszukanej notatki:** Edytuj notatkę:",
-                        value=st.session_state.get("search_note_text", ""),
-                        key="search_note_text_area_no_chat"
-                    )
-
-                # --- Poprawa przez GPT-4o ---
-                if st.button("Popraw notatkę przez ChatGPT-4o", key="search_correct_btn_no_chat"):
-                    openai_client = get_openai_client()
-                    response = openai_client.chat.completions.create(
-                        model="gpt-4o",
-                        messages=[
-                            {"role": "system", "content": "Jesteś pomocnym asystentem, który wykrywa język przetwarzanego tekstu, a następnie koncentruje się jedynie na poprawie ewentualnych błędów w tym tekście, w tym samym języku: np. jeśli wykryjesz tekst napisany po polsku, popraw zgodnie z zasadami języka polskiego; jeśli wykryjesz tekst napisany po angielsku, popraw zgodnie z zasadami języka angielskiego. Poprawiaj tekst pod względem gramatycznym, stylistycznym, składniowym i ortograficznym. Popraw tylko błędy, nie zmieniaj sensu wypowiedzi."},
-                            {"role": "user", "content": st.session_state["search_note_text"]},
-                        ],
-                        max_tokens=5000,
-                    )
-                    st.session_state["search_note_text_corrected"] = response.choices[0].message.content
-
-                # --- Wyświetl poprawioną wersję, jeśli istnieje ---
-                note_to_translate = st.session_state["search_note_text"]
-                if st.session_state.get("search_note_text_corrected"):
-                    st.session_state["search_note_text_corrected"] = st.text_area(
-                        "**Druga wersja wyszukanej notatki:** Poprawiona notatka (możesz edytować):",
-                        value=st.session_state["search_note_text_corrected"],
-                        key="search_note_text_corrected_area"
-                    )
-                    note_to_translate = st.session_state["search_note_text_corrected"]
-
-                st.markdown("---")
-                st.subheader("Akcje dla wybranej notatki:")
-
-                # --- Zakładki jak w add_tab, ale operujące na note_to_translate ---
-                tab1s, tab2s, tab3s, tab4s = st.tabs([
-                    "🇬🇧 Tłumaczenie na British English", 
-                    "🇺🇸 Tłumaczenie na American English", 
-                    "🇵🇱 Tłumaczenie na Polski", 
-                    "🌍 Tłumaczenie na wybrany język"
-                ])
-
-                with tab1s:
-                    st.header("🇬🇧 Tłumaczenie na British English")
-                    st.write("Wybierz wersję wyszukanej notatki do tłumaczenia:")
-
-                    # Wybór wersji notatki
-                    note_options = []
-                    if st.session_state.get("search_note_text"):
-                        note_options.append("Pierwsza wersja wyszukanej notatki")
-                    if st.session_state.get("search_note_text_corrected"):
-                        note_options.append("Druga wersja wyszukanej notatki (poprawiona przez GPT-4o)")
-
-                    if note_options:
-                        selected_note = st.radio(
-                            "Wersja notatki:",
-                            note_options,
-                            key="search_translation_note_select"
-                        )
-
-                        # Pobierz wybrany tekst
-                        if selected_note == "Pierwsza wersja wyszukanej notatki":
-                            text_to_translate = st.session_state["search_note_text"]
-                        else:
-                            text_to_translate = st.session_state["search_note_text_corrected"]
-
-                        # Przycisk tłumaczenia
-                        if st.button("Przetłumacz na brytyjski angielski", key="search_translate_br"):
-                            openai_client = get_openai_client()
-                            response = openai_client.chat.completions.create(
-                                model="gpt-4o",
-                                messages=[
-                                    {"role": "system", "content": "Jesteś tłumaczem. Przetłumacz poniższy tekst na brytyjski angielski, zachowując sens i styl oryginału."},
-                                    {"role": "user", "content": text_to_translate},
-                                ],
-                                max_tokens=5000,
-                            )
-                            st.session_state["search_translated_text_br"] = response.choices[0].message.content
-
-                        # Pole do edycji tłumaczenia
-                        if "search_translated_text_br" in st.session_state:
-                            st.session_state["search_translated_text_br"] = st.text_area(
-                                "Tłumaczenie na BR ENG (możesz edytować):",
-                                value=st.session_state["search_translated_text_br"],
-                                key="search_translated_text_br_area"
-                            )
-
-                            # Wybór głosu do syntezy mowy
-                            voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                            selected_voice = st.selectbox(
-                                "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                                options=voice_options,
-                                key="search_tts_voice_select_br"
-                            )
-
-                            # Przycisk do generowania audio z tłumaczenia
-                            if st.button("Wygeneruj audio z tłumaczenia na British English", key="search_tts_br"):
-                                openai_client = get_openai_client()
-                                tts_response = openai_client.audio.speech.create(
-                                    model="tts-1",
-                                    voice=selected_voice,
-                                    input=st.session_state["search_translated_text_br"]
-                                )
-                                st.session_state["search_tts_br_audio"] = tts_response.content
-
-                            # Odtwarzacz audio, jeśli audio zostało wygenerowane
-                            if "search_tts_br_audio" in st.session_state:
-                                st.audio(st.session_state["search_tts_br_audio"], format="audio/mp3")
-                    else:
-                        st.info("Brak wersji wyszukanej notatki do tłumaczenia. Edytuj lub popraw notatkę w zakładce 'Dodaj notatkę'.")
-
-                with tab2s:
-                    st.header("🇺🇸 Tłumaczenie na American English")
-                    st.write("Wybierz wersję wyszukanej notatki do tłumaczenia:")
-
-                    note_options = []
-                    if st.session_state.get("search_note_text"):
-                        note_options.append("Pierwsza wersja wyszukanej notatki")
-                    if st.session_state.get("search_note_text_corrected"):
-                        note_options.append("Druga wersja wyszukanej notatki (poprawiona przez GPT-4o)")
-
-                    if note_options:
-                        selected_note = st.radio(
-                            "Wersja notatki:",
-                            note_options,
-                            key="search_translation_note_select_us"
-                        )
-
-                        if selected_note == "Pierwsza wersja wyszukanej notatki":
-                            text_to_translate = st.session_state["search_note_text"]
-                        else:
-                            text_to_translate = st.session_state["search_note_text_corrected"]
-
-                        if st.button("Przetłumacz na amerykański angielski", key="search_translate_us"):
-                            openai_client = get_openai_client()
-                            response = openai_client.chat.completions.create(
-                                model="gpt-4o",
-                                messages=[
-                                    {"role": "system", "content": "Jesteś tłumaczem. Przetłumacz poniższy tekst na amerykański angielski, zachowując sens i styl oryginału."},
-                                    {"role": "user", "content": text_to_translate},
-                                ],
-                                max_tokens=5000,
-                            )
-                            st.session_state["search_translated_text_us"] = response.choices[0].message.content
-
-                        if "search_translated_text_us" in st.session_state:
-                            st.session_state["search_translated_text_us"] = st.text_area(
-                                "Tłumaczenie na US ENG (możesz edytować):",
-                                value=st.session_state["search_translated_text_us"],
-                                key="search_translated_text_us_area"
-                            )
-
-                            voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                            selected_voice_us = st.selectbox(
-                                "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                                options=voice_options,
-                                key="search_tts_voice_select_us"
-                            )
-
-                            if st.button("Wygeneruj audio z tłumaczenia na American English", key="search_tts_us"):
-                                openai_client = get_openai_client()
-                                tts_response = openai_client.audio.speech.create(
-                                    model="tts-1",
-                                    voice=selected_voice_us,
-                                    input=st.session_state["search_translated_text_us"]
-                                )
-                                st.session_state["search_tts_us_audio"] = tts_response.content
-
-                            if "search_tts_us_audio" in st.session_state:
-                                st.audio(st.session_state["search_tts_us_audio"], format="audio/mp3")
-                    else:
-                        st.info("Brak wersji wyszukanej notatki do tłumaczenia. Edytuj lub popraw notatkę powyżej.")
-
-                with tab3s:
-                    st.header("🇵🇱 Tłumaczenie na Polski")
-                    st.write("Wybierz wersję wyszukanej notatki do tłumaczenia:")
-
-                    note_options = []
-                    if st.session_state.get("search_note_text"):
-                        note_options.append("Pierwsza wersja wyszukanej notatki")
-                    if st.session_state.get("search_note_text_corrected"):
-                        note_options.append("Druga wersja wyszukanej notatki (poprawiona przez GPT-4o)")
-
-                    if note_options:
-                        selected_note = st.radio(
-                            "Wersja notatki:",
-                            note_options,
-                            key="search_translation_note_select_pl"
-                        )
-
-                        if selected_note == "Pierwsza wersja wyszukanej notatki":
-                            text_to_translate = st.session_state["search_note_text"]
-                        else:
-                            text_to_translate = st.session_state["search_note_text_corrected"]
-
-                        if st.button("Przetłumacz na polski", key="search_translate_pl"):
-                            openai_client = get_openai_client()
-                            response = openai_client.chat.completions.create(
-                                model="gpt-4o",
-                                messages=[
-                                    {"role": "system", "content": "Jesteś tłumaczem. Przetłumacz poniższy tekst na język polski, zachowując sens i styl oryginału."},
-                                    {"role": "user", "content": text_to_translate},
-                                ],
-                                max_tokens=5000,
-                            )
-                            st.session_state["search_translated_text_pl"] = response.choices[0].message.content
-
-                        if "search_translated_text_pl" in st.session_state:
-                            st.session_state["search_translated_text_pl"] = st.text_area(
-                                "Tłumaczenie na polski (możesz edytować):",
-                                value=st.session_state["search_translated_text_pl"],
-                                key="search_translated_text_pl_area"
-                            )
-
-                            voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                            selected_voice_pl = st.selectbox(
-                                "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                                options=voice_options,
-                                key="search_tts_voice_select_pl"
-                            )
-
-                            if st.button("Wygeneruj audio z tłumaczenia na polski", key="search_tts_pl"):
-                                openai_client = get_openai_client()
-                                tts_response = openai_client.audio.speech.create(
-                                    model="tts-1",
-                                    voice=selected_voice_pl,
-                                    input=st.session_state["search_translated_text_pl"]
-                                )
-                                st.session_state["search_tts_pl_audio"] = tts_response.content
-
-                            if "search_tts_pl_audio" in st.session_state:
-                                st.audio(st.session_state["search_tts_pl_audio"], format="audio/mp3")
-                    else:
-                        st.info("Brak wersji wyszukanej notatki do tłumaczenia. Edytuj lub popraw notatkę powyżej.")
-
-                with tab4s:
-                    st.header("🌍 Tłumaczenie na wybrany język")
-                    st.write("Wybierz wersję wyszukanej notatki oraz język docelowy do tłumaczenia:")
-
-                    note_options = []
-                    if st.session_state.get("search_note_text"):
-                        note_options.append("Pierwsza wersja wyszukanej notatki")
-                    if st.session_state.get("search_note_text_corrected"):
-                        note_options.append("Druga wersja wyszukanej notatki (poprawiona przez GPT-4o)")
-
-                    # Lista języków obsługiwanych przez TTS-1 (OpenAI, stan na czerwiec 2024)
-                    tts_languages = {
-                        "en": ("English", "angielski", "alloy"),
-                        "de": ("German", "niemiecki", "echo"),
-                        "es": ("Spanish", "hiszpański", "fable"),
-                        "fr": ("French", "francuski", "nova"),
-                        "it": ("Italian", "włoski", "onyx"),
-                        "pt": ("Portuguese", "portugalski", "shimmer"),
-                        "pl": ("Polish", "polski", "alloy"),
-                        "tr": ("Turkish", "turecki", "alloy"),
-                        "hi": ("Hindi", "hindi", "alloy"),
-                        "ja": ("Japanese", "japoński", "alloy"),
-                        "ko": ("Korean", "koreański", "alloy"),
-                        "zh": ("Chinese", "chiński uproszczony", "alloy"),
-                    }
-                    language_display = [f"{v[0]} ({k})" for k, v in tts_languages.items()]
-
-                    if note_options:
-                        selected_note = st.radio(
-                            "Wersja notatki:",
-                            note_options,
-                            key="search_translation_note_select_any"
-                        )
-
-                        if selected_note == "Pierwsza wersja wyszukanej notatki":
-                            text_to_translate = st.session_state["search_note_text"]
-                        else:
-                            text_to_translate = st.session_state["search_note_text_corrected"]
-
-                        selected_lang_display = st.selectbox(
-                            "Wybierz język docelowy do tłumaczenia:",
-                            language_display,
-                            key="search_target_language_select"
-                        )
-                        selected_lang_code = selected_lang_display.split("(")[-1].replace(")", "").strip()
-                        selected_lang_prompt = tts_languages[selected_lang_code][1]
-
-                        if st.button("Przetłumacz na wybrany język", key="search_translate_any"):
-                            openai_client = get_openai_client()
-                            response = openai_client.chat.completions.create(
-                                model="gpt-4o",
-                                messages=[
-                                    {"role": "system", "content": f"Jesteś tłumaczem. Przetłumacz poniższy tekst na {selected_lang_prompt}, zachowując sens i styl oryginału."},
-                                    {"role": "user", "content": text_to_translate},
-                                ],
-                                max_tokens=5000,
-                            )
-                            st.session_state["search_translated_text_any"] = response.choices[0].message.content
-                            st.session_state["search_translated_lang_code"] = selected_lang_code
-
-                        if "search_translated_text_any" in st.session_state:
-                            st.session_state["search_translated_text_any"] = st.text_area(
-                                f"Tłumaczenie na {tts_languages.get(st.session_state.get('search_translated_lang_code', 'en'), ('Wybrany język',))[0]} (możesz edytować):",
-                                value=st.session_state["search_translated_text_any"],
-                                key="search_translated_text_any_area"
-                            )
-
-                            voice_options = ["alloy", "onyx", "echo", "fable", "nova", "shimmer"]
-                            selected_voice_any = st.selectbox(
-                                "Wybierz typ/rodzaj głosu do syntezy mowy:",
-                                options=voice_options,
-                                key="search_tts_voice_select_any"
-                            )
-
-                            if st.button("Wygeneruj audio z tłumaczenia na wybrany język", key="search_tts_any"):
-                                openai_client = get_openai_client()
-                                tts_response = openai_client.audio.speech.create(
-                                    model="tts-1",
-                                    voice=selected_voice_any,
-                                    input=st.session_state["search_translated_text_any"],
-                                    response_format="mp3",
-                                    speed=1.0,
-                                )
-                                st.session_state["search_tts_any_audio"] = tts_response.content
-
-                            if "search_tts_any_audio" in st.session_state:
-                                st.audio(st.session_state["search_tts_any_audio"], format="audio/mp3")
-                    else:
-                        st.info("Brak wersji wyszukanej notatki do tłumaczenia. Edytuj lub popraw notatkę powyżej.")
\ No newline at end of file
+            render_search_tab()
+    with col_chat:
+        render_chat()
+else:
+    add_tab, search_tab = st.tabs(["Dodaj notatkę", "Wyszukaj notatkę"])
+    with add_tab:
+        render_add_note_tab()
+    with search_tab:
+        render_search_tab(key_suffix="_no_chat", result_columns=(8, 1))